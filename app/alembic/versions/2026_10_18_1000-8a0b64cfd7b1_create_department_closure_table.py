@@ -0,0 +1,69 @@
+"""create department_closure table
+
+Revision ID: 8a0b64cfd7b1
+Revises: 2b6b97cde912
+Create Date: 2026-10-18 10:00:12.418337
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a0b64cfd7b1"
+down_revision: Union[str, None] = "2b6b97cde912"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "department_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["ancestor_id"],
+            ["departments.id"],
+            name=op.f("fk_department_closure_ancestor_id_departments"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["descendant_id"],
+            ["departments.id"],
+            name=op.f("fk_department_closure_descendant_id_departments"),
+        ),
+        sa.PrimaryKeyConstraint(
+            "ancestor_id", "descendant_id", name=op.f("pk_department_closure")
+        ),
+    )
+    op.create_index(
+        op.f("ix_department_closure_descendant_id"),
+        "department_closure",
+        ["descendant_id"],
+        unique=False,
+    )
+    # Backfill the closure from the existing parent_id hierarchy.
+    op.execute(
+        """
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM departments
+            UNION ALL
+            SELECT tree.ancestor_id, departments.id, tree.depth + 1
+            FROM departments
+            JOIN tree ON departments.parent_id = tree.descendant_id
+        )
+        INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM tree
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_department_closure_descendant_id"),
+        table_name="department_closure",
+    )
+    op.drop_table("department_closure")
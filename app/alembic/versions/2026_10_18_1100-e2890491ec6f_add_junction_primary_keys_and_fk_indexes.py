@@ -0,0 +1,64 @@
+"""add junction primary keys and fk indexes
+
+Revision ID: e2890491ec6f
+Revises: 8a0b64cfd7b1
+Create Date: 2026-10-18 11:00:47.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2890491ec6f"
+down_revision: Union[str, None] = "8a0b64cfd7b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JUNCTION_TABLES = (
+    ("employee_position", "employee_id", "position_id"),
+    ("departament_position", "departament_id", "position_id"),
+)
+
+
+def upgrade() -> None:
+    for table, left, right in JUNCTION_TABLES:
+        op.execute(f"DELETE FROM {table} WHERE {left} IS NULL OR {right} IS NULL")
+        op.execute(
+            f"""
+            DELETE FROM {table} a USING {table} b
+            WHERE a.ctid < b.ctid
+              AND a.{left} = b.{left}
+              AND a.{right} = b.{right}
+            """
+        )
+        op.alter_column(table, left, existing_type=sa.Integer(), nullable=False)
+        op.alter_column(table, right, existing_type=sa.Integer(), nullable=False)
+        op.create_primary_key(op.f(f"pk_{table}"), table, [left, right])
+        op.create_index(op.f(f"ix_{table}_{right}"), table, [right], unique=False)
+
+    op.create_index(
+        op.f("ix_employees_department_id"),
+        "employees",
+        ["department_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_departments_parent_id"),
+        "departments",
+        ["parent_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_departments_parent_id"), table_name="departments")
+    op.drop_index(op.f("ix_employees_department_id"), table_name="employees")
+    for table, left, right in JUNCTION_TABLES:
+        op.drop_index(op.f(f"ix_{table}_{right}"), table_name=table)
+        op.drop_constraint(op.f(f"pk_{table}"), table, type_="primary")
+        op.alter_column(table, right, existing_type=sa.Integer(), nullable=True)
+        op.alter_column(table, left, existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,34 @@
+"""add version columns
+
+Revision ID: 82912cfb2986
+Revises: e2890491ec6f
+Create Date: 2026-10-18 12:00:05.213764
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "82912cfb2986"
+down_revision: Union[str, None] = "e2890491ec6f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ("departments", "positions", "employees")
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, "version")
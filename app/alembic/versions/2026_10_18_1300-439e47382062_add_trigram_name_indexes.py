@@ -0,0 +1,42 @@
+"""add trigram name indexes
+
+Revision ID: 439e47382062
+Revises: 82912cfb2986
+Create Date: 2026-10-18 13:00:31.640278
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "439e47382062"
+down_revision: Union[str, None] = "82912cfb2986"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = (
+    ("departments", "name"),
+    ("positions", "title"),
+    ("employees", "name"),
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in SEARCH_COLUMNS:
+        op.create_index(
+            f"ix_{table}_{column}_trgm",
+            table,
+            [column],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for table, column in SEARCH_COLUMNS:
+        op.drop_index(f"ix_{table}_{column}_trgm", table_name=table)
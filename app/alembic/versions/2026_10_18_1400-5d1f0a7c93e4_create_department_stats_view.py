@@ -0,0 +1,73 @@
+"""create department stats view
+
+Revision ID: 5d1f0a7c93e4
+Revises: 439e47382062
+Create Date: 2026-10-18 14:00:12.408731
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d1f0a7c93e4"
+down_revision: Union[str, None] = "439e47382062"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A position linked to a department counts as filled when an employee
+    # of that department holds it.
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW department_stats AS
+        WITH direct AS (
+            SELECT departments.id AS department_id,
+                   count(employees.id) AS direct_headcount
+            FROM departments
+            LEFT JOIN employees ON employees.department_id = departments.id
+            GROUP BY departments.id
+        ), total AS (
+            SELECT department_closure.ancestor_id AS department_id,
+                   count(employees.id) AS total_headcount
+            FROM department_closure
+            JOIN employees
+                ON employees.department_id = department_closure.descendant_id
+            GROUP BY department_closure.ancestor_id
+        ), positions AS (
+            SELECT departament_position.departament_id AS department_id,
+                   count(*) AS position_count,
+                   count(*) FILTER (WHERE EXISTS (
+                       SELECT 1 FROM employee_position
+                       JOIN employees
+                           ON employees.id = employee_position.employee_id
+                       WHERE employee_position.position_id =
+                             departament_position.position_id
+                         AND employees.department_id =
+                             departament_position.departament_id
+                   )) AS filled_positions
+            FROM departament_position
+            GROUP BY departament_position.departament_id
+        )
+        SELECT direct.department_id,
+               direct.direct_headcount,
+               coalesce(total.total_headcount, 0) AS total_headcount,
+               coalesce(positions.position_count, 0) AS position_count,
+               coalesce(positions.filled_positions, 0) AS filled_positions
+        FROM direct
+        LEFT JOIN total USING (department_id)
+        LEFT JOIN positions USING (department_id)
+        """
+    )
+    # Required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX ix_department_stats_department_id "
+        "ON department_stats (department_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW department_stats")
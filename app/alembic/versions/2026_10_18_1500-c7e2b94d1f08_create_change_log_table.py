@@ -0,0 +1,42 @@
+"""create change log table
+
+Revision ID: c7e2b94d1f08
+Revises: 5d1f0a7c93e4
+Create Date: 2026-10-18 15:00:47.215390
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2b94d1f08"
+down_revision: Union[str, None] = "5d1f0a7c93e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("op", sa.String(), nullable=False),
+        sa.Column("object_id", sa.Integer(), nullable=True),
+        sa.Column("data", postgresql.JSONB(none_as_null=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_change_log")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("change_log")
@@ -2,8 +2,24 @@ from fastapi import APIRouter
 from .department import router as department_router
 from .position import router as position_router
 from .employee import router as employee_router
+from .export import router as export_router
+from .monitoring import router as monitoring_router
+from .batch import router as batch_router
+from .authz import router as authz_router
+from .graph import router as graph_router
+from .search import router as search_router
+from .stats import router as stats_router
+from .changes import router as changes_router
 
 router = APIRouter(prefix="/api")
 router.include_router(department_router)
 router.include_router(position_router)
-router.include_router(employee_router)
\ No newline at end of file
+router.include_router(employee_router)
+router.include_router(export_router)
+router.include_router(monitoring_router)
+router.include_router(batch_router)
+router.include_router(authz_router)
+router.include_router(graph_router)
+router.include_router(search_router)
+router.include_router(stats_router)
+router.include_router(changes_router)
\ No newline at end of file
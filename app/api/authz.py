@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import get_async_session
+from database.rights import get_rights_masks, registry
+from schemas.authz import AuthzCheckInSchema, AuthzCheckOutSchema, \
+    AuthzResultSchema
+
+router = APIRouter(tags=['Authz'])
+
+
+@router.post('/authz/check', response_model=AuthzCheckOutSchema,
+             status_code=200)
+async def check(data: AuthzCheckInSchema,
+                session: AsyncSession = Depends(get_async_session)):
+    masks = await get_rights_masks(
+        (item.employee_id for item in data.checks), data.inherit, session)
+    results = [AuthzResultSchema(
+        employee_id=item.employee_id, right=item.right,
+        allowed=bool(masks.get(item.employee_id, 0) &
+                     registry.lookup(item.right)))
+        for item in data.checks]
+    return AuthzCheckOutSchema(results=results)
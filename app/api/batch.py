@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import get_async_session
+from database.batch import run_batch
+from schemas.batch import BatchInSchema, BatchOutSchema
+
+router = APIRouter(tags=['Batch'])
+
+
+@router.post('/batch', response_model=BatchOutSchema, status_code=200)
+async def batch(data: BatchInSchema,
+                session: AsyncSession = Depends(get_async_session)):
+    result = await run_batch(data, session)
+    return result
@@ -0,0 +1,32 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import get_async_session
+from database.changes import list_changes, stream_changes
+from schemas.changes import ChangeSchema
+from schemas.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix='/changes', tags=['Changes'])
+
+
+@router.get('', response_model=list[ChangeSchema], status_code=200)
+async def read_changes(since: int = Query(0, ge=0),
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1,
+                                          le=MAX_PAGE_SIZE),
+                       session: AsyncSession = Depends(get_async_session)):
+    changes = await list_changes(since, limit, session)
+    return changes
+
+
+@router.get('/stream', status_code=200)
+async def changes_stream(since: Optional[int] = Query(None, ge=0),
+                         last_event_id: Optional[int] = Header(None)):
+    # Reconnecting EventSource clients resume from the last id they saw
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(stream_changes(start),
+                             media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache',
+                                      'X-Accel-Buffering': 'no'})
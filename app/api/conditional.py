@@ -0,0 +1,41 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+
+def strong_etag(namespace: str, object_id: int, version: int) -> str:
+    return f'"{namespace}-{object_id}-{version}"'
+
+
+def weak_etag(namespace: str, items: Iterable,
+              next_cursor: Optional[int] = None) -> str:
+    digest = hashlib.sha1(namespace.encode())
+    for item in items:
+        digest.update(f"{item.id}:{item.version};".encode())
+    digest.update(str(next_cursor).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    # If-None-Match uses the weak comparison function
+    opaque = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == opaque
+               for candidate in header.split(','))
+
+
+def not_modified(request: Request, response: Response,
+                 etag: str) -> Optional[Response]:
+    """Return a 304 response when the client already has `etag`.
+
+    Otherwise the ETag header is set on the route's response and None is
+    returned, so the body is only serialized when it is actually sent.
+    """
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return None
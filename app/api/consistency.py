@@ -0,0 +1,38 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from database.replicas import PRIMARY_PIN_COOKIE
+
+WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary for a while after it writes.
+
+    Successful write responses set a cookie that `get_read_session` honors
+    until it expires, so the client does not read from a lagging replica.
+    """
+
+    def __init__(self, app: ASGIApp, window: int):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['method'] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message: Message):
+            if message['type'] == 'http.response.start' and \
+                    message['status'] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append('Set-Cookie',
+                               f'{PRIMARY_PIN_COOKIE}='
+                               f'{time.time() + self.window:.3f}; '
+                               f'Max-Age={self.window}; Path=/; HttpOnly; '
+                               f'SameSite=Lax')
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
@@ -1,23 +1,117 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.expand import expand_param, dump_expanded
+from api.conditional import not_modified, strong_etag, weak_etag
+from api.pagination import set_next_cursor
+from api.responses import rows_response
 from database.base import get_async_session
-from database.crud import get_department_by_id, create_department_crud, \
+from database.replicas import get_read_session
+from database.bulk import bulk_import_departments
+from database.stats import get_department_stats
+from database.crud import get_department_cached, create_department_crud, \
     delete_department_crud, get_department_employee, add_department_position, \
-    delete_department_position
+    delete_department_position, get_department_tree, \
+    get_department_ancestors, is_department_descendant, \
+    list_departments_crud, get_department_by_id, reparent_department_crud, \
+    reassign_employees_crud
 from schemas.department import DepartmentOutSchema, DepartmentInSchema, \
-    DepartmentPositionSchema
-from schemas.employee import EmployeeOutSchema
+    DepartmentPositionSchema, DepartmentTreeSchema, DepartmentMoveSchema, \
+    ReassignResultSchema, DeleteStrategy
+from schemas.employee import EmployeeOutSchema, EmployeeReassignSchema
+from schemas.bulk import BulkImportResultSchema
+from schemas.expand import DepartmentExpandedSchema, EmployeeExpandedSchema, \
+    DEPARTMENT_RELATIONS, EMPLOYEE_RELATIONS
+from schemas.pagination import PageSchema
+from schemas.stats import DepartmentStatsSchema
 
 router = APIRouter(tags=['Department'])
 
 
-@router.get('/departments/{department_id}', response_model=DepartmentOutSchema,
-            status_code=200)
-async def get_department(department_id: int,
+@router.get('/departments', response_model=list[DepartmentExpandedSchema],
+            response_model_exclude_unset=True, status_code=200)
+async def list_departments(request: Request, response: Response,
+                           page: PageSchema = Depends(),
+                           parent_id: Optional[int] = None,
+                           expand: list[str] = Depends(
+                               expand_param(DEPARTMENT_RELATIONS)),
+                           session: AsyncSession = Depends(
+                               get_read_session)):
+    departments, next_cursor = await list_departments_crud(page, session,
+                                                           parent_id, expand)
+    # Link changes do not bump versions, so expanded pages get no ETag
+    if not expand:
+        etag = weak_etag('departments', departments, next_cursor)
+        if cached_response := not_modified(request, response, etag):
+            return cached_response
+    set_next_cursor(response, next_cursor)
+    if not expand:
+        return rows_response(departments, DepartmentOutSchema, response)
+    return [dump_expanded(department, DepartmentOutSchema,
+                          DEPARTMENT_RELATIONS, expand)
+            for department in departments]
+
+
+@router.get('/departments/{department_id}',
+            response_model=DepartmentExpandedSchema,
+            response_model_exclude_unset=True, status_code=200)
+async def get_department(department_id: int, request: Request,
+                         response: Response,
+                         expand: list[str] = Depends(
+                             expand_param(DEPARTMENT_RELATIONS)),
                          session: AsyncSession = Depends(get_async_session)):
-    department = await get_department_by_id(department_id, session)
-    return department
+    if expand:
+        department = await get_department_by_id(department_id, session,
+                                                expand)
+        return dump_expanded(department, DepartmentOutSchema,
+                             DEPARTMENT_RELATIONS, expand)
+    department = await get_department_cached(department_id, session)
+    etag = strong_etag('department', department_id, department['version'])
+    if cached_response := not_modified(request, response, etag):
+        return cached_response
+    return department['data']
+
+
+@router.get('/departments/{department_id}/tree',
+            response_model=DepartmentTreeSchema,
+            response_model_exclude_none=True, status_code=200)
+async def get_department_subtree(department_id: int,
+                                 depth: Optional[int] = Query(None, ge=0),
+                                 include_employees: bool = False,
+                                 session: AsyncSession = Depends(
+                                     get_read_session)):
+    tree = await get_department_tree(department_id, session, depth,
+                                     include_employees)
+    return tree
+
+
+@router.get('/departments/{department_id}/ancestors',
+            response_model=list[DepartmentOutSchema], status_code=200)
+async def get_ancestors(department_id: int,
+                        session: AsyncSession = Depends(get_read_session)):
+    ancestors = await get_department_ancestors(department_id, session)
+    return ancestors
+
+
+@router.get('/departments/{department_id}/contains/{descendant_id}',
+            status_code=200)
+async def contains_department(department_id: int, descendant_id: int,
+                              session: AsyncSession = Depends(
+                                  get_read_session)):
+    contains = await is_department_descendant(department_id, descendant_id,
+                                              session)
+    return contains
+
+
+@router.get('/departments/{department_id}/stats',
+            response_model=DepartmentStatsSchema, status_code=200)
+async def department_stats(department_id: int,
+                           session: AsyncSession = Depends(
+                               get_read_session)):
+    stats = await get_department_stats(department_id, session)
+    return stats
 
 
 @router.post('/departments', response_model=DepartmentOutSchema,
@@ -29,20 +123,65 @@ async def create_department(department: DepartmentInSchema,
     return department
 
 
+@router.post('/departments/bulk', response_model=BulkImportResultSchema,
+             status_code=200)
+async def import_departments(request: Request,
+                             format: Literal['ndjson', 'csv'] = 'ndjson',
+                             session: AsyncSession = Depends(
+                                 get_async_session)):
+    result = await bulk_import_departments(request.stream(), format, session)
+    return result
+
+
+@router.post('/departments/{department_id}/move',
+             response_model=DepartmentOutSchema, status_code=200)
+async def move_department(department_id: int, data: DepartmentMoveSchema,
+                          session: AsyncSession = Depends(get_async_session)):
+    department = await reparent_department_crud(department_id,
+                                                data.parent_id, session)
+    return department
+
+
+@router.post('/departments/{department_id}/reassign-employees',
+             response_model=ReassignResultSchema, status_code=200)
+async def reassign_employees(department_id: int,
+                             data: EmployeeReassignSchema,
+                             session: AsyncSession = Depends(
+                                 get_async_session)):
+    moved = await reassign_employees_crud(department_id, data, session)
+    return ReassignResultSchema(moved=len(moved), employee_ids=moved)
+
+
 @router.delete('/departments/{department_id}', status_code=204)
 async def delete_department(department_id: int,
+                            strategy: DeleteStrategy = 'orphan',
                             session: AsyncSession = Depends(
                                 get_async_session)):
-    await delete_department_crud(department_id, session)
+    await delete_department_crud(department_id, session, strategy=strategy)
 
 
 @router.get('/departments/{department_id}/employees',
-            response_model=list[EmployeeOutSchema], status_code=200)
-async def get_department_employees(department_id: int,
+            response_model=list[EmployeeExpandedSchema],
+            response_model_exclude_unset=True, status_code=200)
+async def get_department_employees(department_id: int, request: Request,
+                                   response: Response,
+                                   page: PageSchema = Depends(),
+                                   expand: list[str] = Depends(
+                                       expand_param(EMPLOYEE_RELATIONS)),
                                    session: AsyncSession = Depends(
-                                       get_async_session)):
-    employees = await get_department_employee(department_id, session)
-    return employees
+                                       get_read_session)):
+    employees, next_cursor = await get_department_employee(department_id,
+                                                           page, session,
+                                                           expand)
+    if not expand:
+        etag = weak_etag('employees', employees, next_cursor)
+        if cached_response := not_modified(request, response, etag):
+            return cached_response
+    set_next_cursor(response, next_cursor)
+    if not expand:
+        return rows_response(employees, EmployeeOutSchema, response)
+    return [dump_expanded(employee, EmployeeOutSchema, EMPLOYEE_RELATIONS,
+                          expand) for employee in employees]
 
 
 @router.post('/departments/add_position', status_code=201)
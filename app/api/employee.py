@@ -1,20 +1,75 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.expand import expand_param, dump_expanded
+from api.conditional import not_modified, strong_etag, weak_etag
+from api.pagination import set_next_cursor
+from api.responses import rows_response
 from database.base import get_async_session
+from database.replicas import get_read_session
+from database.bulk import bulk_import_employees
 from schemas.employee import EmployeeOutSchema, EmployeeInSchema
-from database.crud import get_employee_crud, create_employee_crud, \
-    update_employee_crud, delete_employee_crud
+from schemas.bulk import BulkImportResultSchema
+from schemas.expand import EmployeeExpandedSchema, EMPLOYEE_RELATIONS
+from schemas.authz import EmployeeRightsSchema
+from schemas.pagination import PageSchema
+from database.crud import get_employee_cached, create_employee_crud, \
+    update_employee_crud, delete_employee_crud, list_employees_crud, \
+    get_employee_crud, get_employee_rights
 
 router = APIRouter(tags=['Employee'])
 
 
-@router.get("/employees/{employee_id}", response_model=EmployeeOutSchema,
-            status_code=200)
-async def read_employee(employee_id: int,
+@router.get("/employees", response_model=list[EmployeeExpandedSchema],
+            response_model_exclude_unset=True, status_code=200)
+async def list_employees(request: Request, response: Response,
+                         page: PageSchema = Depends(),
+                         department_id: Optional[int] = None,
+                         position_id: Optional[int] = None,
+                         expand: list[str] = Depends(
+                             expand_param(EMPLOYEE_RELATIONS)),
+                         session: AsyncSession = Depends(get_read_session)):
+    employees, next_cursor = await list_employees_crud(
+        page, session, department_id, position_id, expand)
+    # Link changes do not bump versions, so expanded pages get no ETag
+    if not expand:
+        etag = weak_etag('employees', employees, next_cursor)
+        if cached_response := not_modified(request, response, etag):
+            return cached_response
+    set_next_cursor(response, next_cursor)
+    if not expand:
+        return rows_response(employees, EmployeeOutSchema, response)
+    return [dump_expanded(employee, EmployeeOutSchema, EMPLOYEE_RELATIONS,
+                          expand) for employee in employees]
+
+
+@router.get("/employees/{employee_id}", response_model=EmployeeExpandedSchema,
+            response_model_exclude_unset=True, status_code=200)
+async def read_employee(employee_id: int, request: Request,
+                        response: Response,
+                        expand: list[str] = Depends(
+                            expand_param(EMPLOYEE_RELATIONS)),
                         session: AsyncSession = Depends(get_async_session)):
-    employee = await get_employee_crud(employee_id, session)
-    return employee
+    if expand:
+        employee = await get_employee_crud(employee_id, session, expand)
+        return dump_expanded(employee, EmployeeOutSchema, EMPLOYEE_RELATIONS,
+                             expand)
+    employee = await get_employee_cached(employee_id, session)
+    etag = strong_etag('employee', employee_id, employee['version'])
+    if cached_response := not_modified(request, response, etag):
+        return cached_response
+    return employee['data']
+
+
+@router.get("/employees/{employee_id}/rights",
+            response_model=EmployeeRightsSchema, status_code=200)
+async def read_employee_rights(employee_id: int, inherit: bool = False,
+                               session: AsyncSession = Depends(
+                                   get_async_session)):
+    rights = await get_employee_rights(employee_id, session, inherit)
+    return EmployeeRightsSchema(employee_id=employee_id, rights=rights)
 
 
 @router.post("/employee", response_model=EmployeeOutSchema, status_code=201)
@@ -24,6 +79,15 @@ async def create_employee(employee: EmployeeInSchema,
     return new_employee
 
 
+@router.post("/employees/bulk", response_model=BulkImportResultSchema,
+             status_code=200)
+async def import_employees(request: Request,
+                           format: Literal['ndjson', 'csv'] = 'ndjson',
+                           session: AsyncSession = Depends(get_async_session)):
+    result = await bulk_import_employees(request.stream(), format, session)
+    return result
+
+
 @router.put("/employee/{employee_id}", response_model=EmployeeOutSchema,
             status_code=202)
 async def update_employee(employee_id: int, new_data: EmployeeInSchema,
@@ -0,0 +1,40 @@
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def expand_param(relations: dict[str, type[BaseModel]]) -> Callable:
+    """Build a dependency parsing `?expand=a,b` against known relations."""
+    def dependency(expand: Optional[str] = None) -> list[str]:
+        if not expand:
+            return []
+        names = [name.strip() for name in expand.split(',') if name.strip()]
+        unknown = [name for name in names if name not in relations]
+        if unknown:
+            raise HTTPException(status_code=422,
+                                detail=f"Unknown expand: {', '.join(unknown)}")
+        return list(dict.fromkeys(names))
+    return dependency
+
+
+def dump_expanded(obj, schema: type[BaseModel],
+                  relations: dict[str, type[BaseModel]],
+                  expand: list[str]) -> dict:
+    """Serialize an ORM object and only the relationships in `expand`.
+
+    Relationships are never touched unless requested, so nothing is
+    lazily loaded; the caller must have eager-loaded the expanded ones.
+    """
+    data = schema.model_validate(obj, from_attributes=True).model_dump()
+    for name in expand:
+        related = getattr(obj, name)
+        related_schema = relations[name]
+        if isinstance(related, list):
+            data[name] = [related_schema.model_validate(
+                item, from_attributes=True).model_dump() for item in related]
+        else:
+            data[name] = None if related is None else \
+                related_schema.model_validate(
+                    related, from_attributes=True).model_dump()
+    return data
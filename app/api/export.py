@@ -0,0 +1,23 @@
+from typing import Literal
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from database.export import export_rows
+from database.replicas import read_session_maker
+
+router = APIRouter(tags=['Export'])
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+@router.get('/export/{entity}', status_code=200)
+async def export(request: Request,
+                 entity: Literal['employees', 'positions', 'departments'],
+                 format: Literal['ndjson', 'csv'] = 'ndjson'):
+    return StreamingResponse(export_rows(entity, format,
+                                         read_session_maker(request)),
+                             media_type=MEDIA_TYPES[format])
@@ -0,0 +1,63 @@
+import time
+
+from fastapi import APIRouter, HTTPException
+
+from database.graph import org_graph, OrgGraph
+from schemas.department import DepartmentOutSchema
+from schemas.employee import EmployeeOutSchema
+from schemas.graph import OrgGraphStatusSchema
+from schemas.position import PositionOutSchema
+
+router = APIRouter(prefix='/graph', tags=['Graph'])
+
+
+def _graph() -> OrgGraph:
+    if org_graph.graph is None:
+        raise HTTPException(status_code=503, detail="Org graph is disabled")
+    return org_graph.graph
+
+
+def _department_graph(department_id: int) -> OrgGraph:
+    graph = _graph()
+    if graph.department(department_id) is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return graph
+
+
+@router.get('/status', response_model=OrgGraphStatusSchema, status_code=200)
+async def graph_status():
+    graph = _graph()
+    return OrgGraphStatusSchema(age_seconds=time.time() - graph.loaded_at,
+                                footprint_bytes=graph.footprint(),
+                                departments=len(graph.departments),
+                                employees=len(graph.employees),
+                                positions=len(graph.positions))
+
+
+@router.get('/departments/{department_id}/employees',
+            response_model=list[EmployeeOutSchema], status_code=200)
+async def employees_under(department_id: int):
+    return _department_graph(department_id).employees_under(department_id)
+
+
+@router.get('/departments/{department_id}/positions',
+            response_model=list[PositionOutSchema], status_code=200)
+async def positions_in_subtree(department_id: int):
+    graph = _department_graph(department_id)
+    return graph.positions_in_subtree(department_id)
+
+
+@router.get('/departments/{department_id}/chain',
+            response_model=list[DepartmentOutSchema], status_code=200)
+async def department_chain(department_id: int):
+    return _department_graph(department_id).chain_of_command(department_id)
+
+
+@router.get('/employees/{employee_id}/chain',
+            response_model=list[DepartmentOutSchema], status_code=200)
+async def employee_chain(employee_id: int):
+    graph = _graph()
+    employee = graph.employees.get(employee_id)
+    if employee is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return graph.chain_of_command(employee.department_id)
@@ -0,0 +1,268 @@
+import json
+import os
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.exc import IntegrityError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import METRICS_DIR, METRICS_FLUSH_INTERVAL
+from database.base import engine
+from database.cache import stats as cache_stats
+from database.refresh import BackgroundRefresher
+from database.replicas import replica_set
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+# Label used for requests that matched no route, to bound cardinality
+UNMATCHED_ROUTE = 'unmatched'
+
+POOL_GAUGES = ('size', 'checked_in', 'checked_out', 'overflow',
+               'saturation')
+POOL_COUNTERS = ('checkouts', 'timeouts')
+
+# Identifies this worker process; PIDs alone get reused after restarts
+INSTANCE_ID = uuid.uuid4().hex[:12]
+# Flush intervals after which a silent worker counts as exited
+STALE_FLUSHES = 3
+
+
+def _pool_snapshot(pool_engine) -> dict:
+    pool = pool_engine.pool.status_dict()
+    snapshot = {name: pool[name] for name in POOL_GAUGES + POOL_COUNTERS}
+    snapshot['wait_seconds'] = pool['wait_avg'] * pool['checkouts']
+    return snapshot
+
+
+def _pools() -> dict[str, dict]:
+    pools = {'primary': _pool_snapshot(engine)}
+    for replica in replica_set.replicas:
+        url = replica.engine.url
+        pools[f'{url.host}:{url.port}'] = _pool_snapshot(replica.engine)
+    return pools
+
+
+class Metrics:
+    """Counters of the current worker.
+
+    Updates are plain dict increments on the event loop thread, so the
+    request path takes no locks.
+    """
+
+    def __init__(self):
+        self.requests: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.buckets: dict[tuple[str, str], list[int]] = {}
+        self.latency_sum: dict[tuple[str, str], float] = defaultdict(float)
+        self.integrity_errors: dict[int, int] = defaultdict(int)
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route)
+        self.requests[(method, route, status)] += 1
+        self.latency_sum[key] += seconds
+        buckets = self.buckets.get(key)
+        if buckets is None:
+            buckets = self.buckets[key] = [0] * (len(LATENCY_BUCKETS) + 1)
+        buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'instance': INSTANCE_ID,
+            'requests': [[*key, count]
+                         for key, count in self.requests.items()],
+            'latency': [[*key, buckets, self.latency_sum[key]]
+                        for key, buckets in self.buckets.items()],
+            'integrity_errors': dict(self.integrity_errors),
+            'cache': cache_stats.as_dict(),
+            'pools': _pools(),
+        }
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Counts requests and their latency per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            metrics.observe(scope['method'],
+                            route.path if route is not None
+                            else UNMATCHED_ROUTE,
+                            status, time.perf_counter() - started)
+
+
+async def count_integrity_errors(request: Request, exc: HTTPException):
+    """Count crud errors translated from an `IntegrityError`."""
+    if isinstance(exc.__context__, IntegrityError):
+        metrics.integrity_errors[exc.status_code] += 1
+    return await http_exception_handler(request, exc)
+
+
+class MetricsWriter(BackgroundRefresher):
+    """Publishes this worker's snapshot for the other workers.
+
+    Every worker writes `<pid>-<instance>.json` into METRICS_DIR; whichever
+    worker serves `/metrics` merges all of them. A file that has not been
+    rewritten for a few flush intervals belongs to an exited worker.
+    """
+
+    name = 'Metrics'
+
+    def __init__(self, directory: Optional[str], interval: float):
+        super().__init__(interval)
+        self.directory = Path(directory) if directory else None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f'{os.getpid()}-{INSTANCE_ID}.json'
+
+    async def reload(self):
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(metrics.snapshot()))
+        os.replace(temporary, self.path)
+
+    def snapshots(self) -> list[dict]:
+        """Snapshots of all workers, each flagged `live` or exited."""
+        own = dict(metrics.snapshot(), live=True)
+        if self.directory is None:
+            return [own]
+        snapshots = [own]
+        stale_before = time.time() - STALE_FLUSHES * self.interval
+        for path in self.directory.glob('*.json'):
+            if path == self.path:
+                continue
+            try:
+                snapshot = json.loads(path.read_text())
+                snapshot['live'] = path.stat().st_mtime >= stale_before
+            except (OSError, ValueError):
+                continue
+            if 'pools' not in snapshot:
+                # Written by a version without per-engine pools
+                continue
+            snapshots.append(snapshot)
+        return snapshots
+
+
+metrics_writer = MetricsWriter(METRICS_DIR, METRICS_FLUSH_INTERVAL)
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{value}"'
+                          for name, value in labels.items()) + '}'
+
+
+def render(snapshots: list[dict]) -> str:
+    """Merge worker snapshots into the Prometheus text format.
+
+    Counters of exited workers are kept so totals never go down; their
+    gauges are dropped.
+    """
+    requests = defaultdict(int)
+    statuses = defaultdict(int)
+    buckets = {}
+    latency_sum = defaultdict(float)
+    integrity_errors = defaultdict(int)
+    cache = defaultdict(int)
+    for snapshot in snapshots:
+        for method, route, status, count in snapshot['requests']:
+            requests[(method, route, status)] += count
+            statuses[status] += count
+        for method, route, counts, total in snapshot['latency']:
+            merged = buckets.setdefault((method, route), [0] * len(counts))
+            for index, count in enumerate(counts):
+                merged[index] += count
+            latency_sum[(method, route)] += total
+        for status, count in snapshot['integrity_errors'].items():
+            integrity_errors[int(status)] += count
+        for name, count in snapshot['cache'].items():
+            cache[name] += count
+
+    lines = ['# HELP http_requests_total Requests by route and status.',
+             '# TYPE http_requests_total counter']
+    lines += [f'http_requests_total'
+              f'{_labels(method=method, route=route, status=status)} {count}'
+              for (method, route, status), count in sorted(requests.items())]
+    lines += ['# HELP http_responses_total Responses by status code.',
+              '# TYPE http_responses_total counter']
+    lines += [f'http_responses_total{_labels(status=status)} {count}'
+              for status, count in sorted(statuses.items())]
+    lines += ['# HELP http_request_duration_seconds Request latency.',
+              '# TYPE http_request_duration_seconds histogram']
+    for (method, route), counts in sorted(buckets.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket'
+                         f'{_labels(method=method, route=route, le=bound)} '
+                         f'{cumulative}')
+        labels = _labels(method=method, route=route)
+        lines.append(f'http_request_duration_seconds_sum{labels} '
+                     f'{latency_sum[(method, route)]}')
+        lines.append(f'http_request_duration_seconds_count{labels} '
+                     f'{cumulative}')
+    lines += ['# HELP integrity_errors_total Constraint violations '
+              'returned as client errors.',
+              '# TYPE integrity_errors_total counter']
+    lines += [f'integrity_errors_total{_labels(status=status)} {count}'
+              for status, count in sorted(integrity_errors.items())]
+    for name in ('hits', 'misses'):
+        lines += [f'# TYPE cache_{name}_total counter',
+                  f'cache_{name}_total {cache[name]}']
+
+    pools = [(snapshot, _labels(pid=snapshot['pid'],
+                                instance=snapshot['instance'],
+                                engine=engine_name), pool)
+             for snapshot in snapshots
+             for engine_name, pool in snapshot['pools'].items()]
+    for name in POOL_COUNTERS:
+        lines.append(f'# TYPE db_pool_{name}_total counter')
+        lines += [f'db_pool_{name}_total{labels} {pool[name]}'
+                  for _, labels, pool in pools]
+    lines.append('# TYPE db_pool_wait_seconds_total counter')
+    lines += [f'db_pool_wait_seconds_total{labels} {pool["wait_seconds"]}'
+              for _, labels, pool in pools]
+    for name in POOL_GAUGES:
+        lines.append(f'# TYPE db_pool_{name} gauge')
+        lines += [f'db_pool_{name}{labels} {pool[name]}'
+                  for snapshot, labels, pool in pools if snapshot['live']]
+    return '\n'.join(lines) + '\n'
+
+
+router = APIRouter(tags=['Monitoring'])
+
+
+@router.get('/metrics', response_class=PlainTextResponse, status_code=200)
+async def read_metrics():
+    return PlainTextResponse(render(metrics_writer.snapshots()),
+                             media_type='text/plain; version=0.0.4')
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from database.base import engine
+from database.cache import stats
+
+router = APIRouter(tags=['Monitoring'])
+
+
+@router.get('/cache/stats', status_code=200)
+async def cache_stats():
+    return stats.as_dict()
+
+
+@router.get('/pool/stats', status_code=200)
+async def pool_stats():
+    return engine.pool.status_dict()
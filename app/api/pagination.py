@@ -0,0 +1,10 @@
+from typing import Optional
+
+from fastapi import Response
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[int]):
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
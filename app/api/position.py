@@ -1,22 +1,66 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.expand import expand_param, dump_expanded
+from api.conditional import not_modified, strong_etag, weak_etag
+from api.pagination import set_next_cursor
+from api.responses import rows_response
 from database.base import get_async_session
-from database.crud import get_position, create_position_crud, \
+from database.replicas import get_read_session
+from database.bulk import bulk_import_positions
+from database.crud import get_position_cached, create_position_crud, \
     delete_position_crud, update_position_crud, add_employee_crud, \
-    delete_position_employee
+    delete_position_employee, list_positions_crud, get_position
 from schemas.position import PositionOutSchema, PositionInSchema, \
     PositionEmployeeSchema
+from schemas.bulk import BulkImportResultSchema
+from schemas.expand import PositionExpandedSchema, POSITION_RELATIONS
+from schemas.pagination import PageSchema
 
 router = APIRouter(tags=["Position"])
 
 
-@router.get("/positions/{position_id}", response_model=PositionOutSchema,
-            status_code=200)
-async def read_position(position_id: int,
+@router.get("/positions", response_model=list[PositionExpandedSchema],
+            response_model_exclude_unset=True, status_code=200)
+async def list_positions(request: Request, response: Response,
+                         page: PageSchema = Depends(),
+                         department_id: Optional[int] = None,
+                         employee_id: Optional[int] = None,
+                         expand: list[str] = Depends(
+                             expand_param(POSITION_RELATIONS)),
+                         session: AsyncSession = Depends(get_read_session)):
+    positions, next_cursor = await list_positions_crud(
+        page, session, department_id, employee_id, expand)
+    # Link changes do not bump versions, so expanded pages get no ETag
+    if not expand:
+        etag = weak_etag('positions', positions, next_cursor)
+        if cached_response := not_modified(request, response, etag):
+            return cached_response
+    set_next_cursor(response, next_cursor)
+    if not expand:
+        return rows_response(positions, PositionOutSchema, response)
+    return [dump_expanded(position, PositionOutSchema, POSITION_RELATIONS,
+                          expand) for position in positions]
+
+
+@router.get("/positions/{position_id}", response_model=PositionExpandedSchema,
+            response_model_exclude_unset=True, status_code=200)
+async def read_position(position_id: int, request: Request,
+                        response: Response,
+                        expand: list[str] = Depends(
+                            expand_param(POSITION_RELATIONS)),
                         session: AsyncSession = Depends(get_async_session)):
-    position = await get_position(position_id, session)
-    return position
+    if expand:
+        position = await get_position(position_id, session, expand)
+        return dump_expanded(position, PositionOutSchema, POSITION_RELATIONS,
+                             expand)
+    position = await get_position_cached(position_id, session)
+    etag = strong_etag('position', position_id, position['version'])
+    if cached_response := not_modified(request, response, etag):
+        return cached_response
+    return position['data']
 
 
 @router.post("/positions", response_model=PositionOutSchema, status_code=201)
@@ -26,6 +70,15 @@ async def create_position(position: PositionInSchema,
     return position
 
 
+@router.post("/positions/bulk", response_model=BulkImportResultSchema,
+             status_code=200)
+async def import_positions(request: Request,
+                           format: Literal['ndjson', 'csv'] = 'ndjson',
+                           session: AsyncSession = Depends(get_async_session)):
+    result = await bulk_import_positions(request.stream(), format, session)
+    return result
+
+
 @router.delete("/positions/{position_id}", status_code=204)
 async def delete_position(position_id: int,
                           session: AsyncSession = Depends(get_async_session)):
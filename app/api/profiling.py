@@ -0,0 +1,116 @@
+import cProfile
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from database.timing import RequestTimings, current_timings
+
+logger = logging.getLogger(__name__)
+
+# Statements in the log are cut to this many characters
+MAX_STATEMENT_LENGTH = 500
+
+
+def _route_path(scope: Scope) -> str:
+    route = scope.get('route')
+    return route.path if route is not None else scope['path']
+
+
+def _server_timing(timings: RequestTimings, total: float) -> str:
+    app_time = max(total - timings.db_time - timings.pool_wait, 0.0)
+    return ', '.join((
+        f'total;dur={total * 1000:.2f}',
+        f'db;dur={timings.db_time * 1000:.2f};'
+        f'desc="{timings.statements} statements"',
+        f'db-slowest;dur={timings.slowest_time * 1000:.2f}',
+        f'pool;dur={timings.pool_wait * 1000:.2f}',
+        f'app;dur={app_time * 1000:.2f}',
+    ))
+
+
+class ProfilingMiddleware:
+    """Times every request and profiles a sampled fraction of them.
+
+    Database time, statement count and the slowest statement come from
+    engine events (`install_sql_timing`), pool wait from the pool itself;
+    `app` is what remains: dependencies, handler code and serialization.
+    The timing is sent as a `Server-Timing` header and logged as JSON.
+
+    cProfile traces the whole thread, so a dump also contains whatever
+    other requests ran concurrently; only one request is profiled at a
+    time.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0,
+                 profile_dir: str = 'profiles'):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.profile_dir = Path(profile_dir)
+        self._profiling = False
+
+    def _start_profiler(self) -> Optional[cProfile.Profile]:
+        if self._profiling or random.random() >= self.sample_rate:
+            return None
+        self._profiling = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _dump_profile(self, profiler: cProfile.Profile, scope: Scope) -> str:
+        profiler.disable()
+        self._profiling = False
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        route = re.sub(r'\W+', '_', _route_path(scope)).strip('_')
+        path = self.profile_dir / \
+            f"{time.time_ns()}-{scope['method']}-{route}.prof"
+        profiler.dump_stats(path)
+        return str(path)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        profiler = self._start_profiler()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', _server_timing(
+                    timings, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            total = time.perf_counter() - started
+            current_timings.reset(token)
+            profile = self._dump_profile(profiler, scope) \
+                if profiler is not None else None
+            statement = timings.slowest_statement
+            logger.info(json.dumps({
+                'method': scope['method'],
+                'route': _route_path(scope),
+                'status': status,
+                'total_ms': round(total * 1000, 3),
+                'db_ms': round(timings.db_time * 1000, 3),
+                'pool_ms': round(timings.pool_wait * 1000, 3),
+                'statements': timings.statements,
+                'slowest_ms': round(timings.slowest_time * 1000, 3),
+                'slowest_statement': statement[:MAX_STATEMENT_LENGTH]
+                if statement else None,
+                'profile': profile,
+            }))
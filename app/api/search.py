@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.replicas import get_read_session
+from database.crud import search_crud, SEARCH_COLUMNS
+from schemas.search import SearchResultSchema, SearchType
+
+router = APIRouter(tags=['Search'])
+
+MAX_SEARCH_LIMIT = 100
+MAX_SEARCH_OFFSET = 1000
+
+
+@router.get('/search', response_model=list[SearchResultSchema],
+            status_code=200)
+async def search(q: str = Query(min_length=2, max_length=100),
+                 type: Optional[list[SearchType]] = Query(None),
+                 limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+                 offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+                 session: AsyncSession = Depends(get_read_session)):
+    types = list(dict.fromkeys(type)) if type else list(SEARCH_COLUMNS)
+    results = await search_crud(q, types, limit, offset, session)
+    return results
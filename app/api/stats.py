@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.pagination import set_next_cursor
+from database.replicas import get_read_session
+from database.stats import list_department_stats
+from schemas.pagination import PageSchema
+from schemas.stats import DepartmentStatsSchema
+
+router = APIRouter(prefix='/stats', tags=['Stats'])
+
+
+@router.get('/departments', response_model=list[DepartmentStatsSchema],
+            status_code=200)
+async def departments_stats(response: Response,
+                            page: PageSchema = Depends(),
+                            department_id: Optional[list[int]] = Query(None),
+                            session: AsyncSession = Depends(
+                                get_read_session)):
+    stats, next_cursor = await list_department_stats(page, session,
+                                                     department_id)
+    set_next_cursor(response, next_cursor)
+    return stats
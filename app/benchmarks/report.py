@@ -0,0 +1,100 @@
+"""Summaries of a benchmark run and comparison against a baseline."""
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Sample:
+    operation: str
+    latency: float
+    status: int
+
+
+@dataclass
+class ScenarioResult:
+    mix: str
+    duration: float
+    samples: list[Sample] = field(default_factory=list)
+    queries: int | None = None
+
+
+def _latency_ms(latencies: list[float]) -> dict:
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return {'p50': value, 'p95': value, 'p99': value, 'mean': value}
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50': cuts[49] * 1000, 'p95': cuts[94] * 1000,
+            'p99': cuts[98] * 1000,
+            'mean': statistics.fmean(latencies) * 1000}
+
+
+def summarize(result: ScenarioResult,
+              queries_per_operation: dict[str, float]) -> dict:
+    by_operation = defaultdict(list)
+    for sample in result.samples:
+        by_operation[sample.operation].append(sample)
+    total = len(result.samples)
+    return {
+        'requests': total,
+        'duration_s': result.duration,
+        'throughput_rps': total / result.duration if result.duration else 0,
+        'latency_ms': _latency_ms([sample.latency
+                                   for sample in result.samples]),
+        'client_errors': sum(400 <= sample.status < 500
+                             for sample in result.samples),
+        'server_errors': sum(sample.status >= 500 or sample.status == 0
+                             for sample in result.samples),
+        'queries_per_request': result.queries / total
+        if result.queries is not None and total else None,
+        'operations': {
+            name: {
+                'requests': len(samples),
+                'latency_ms': _latency_ms([sample.latency
+                                           for sample in samples]),
+                'queries_per_request': queries_per_operation.get(name),
+            }
+            for name, samples in sorted(by_operation.items())
+        },
+    }
+
+
+def print_summary(results: dict):
+    print(f"{'scenario':<14}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'q/req':>8}{'5xx':>6}")
+    for mix, scenario in results['scenarios'].items():
+        latency = scenario['latency_ms']
+        queries = scenario['queries_per_request']
+        print(f"{mix:<14}{scenario['throughput_rps']:>10.1f}"
+              f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+              f"{latency['p99']:>10.2f}"
+              f"{queries if queries is None else round(queries, 2)!s:>8}"
+              f"{scenario['server_errors']:>6}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions larger than `tolerance` (a fraction) against baseline."""
+    regressions = []
+    for mix, scenario in results['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(mix)
+        if reference is None:
+            continue
+        for percentile in ('p50', 'p95', 'p99'):
+            current = scenario['latency_ms'][percentile]
+            previous = reference['latency_ms'][percentile]
+            if previous and current > previous * (1 + tolerance):
+                regressions.append(
+                    f"{mix}: {percentile} {previous:.2f} -> {current:.2f} ms")
+        current = scenario['throughput_rps']
+        previous = reference['throughput_rps']
+        if previous and current < previous * (1 - tolerance):
+            regressions.append(
+                f"{mix}: throughput {previous:.1f} -> {current:.1f} rps")
+        current = scenario['queries_per_request']
+        previous = reference['queries_per_request']
+        if current is not None and previous is not None and \
+                current > previous * (1 + tolerance):
+            regressions.append(
+                f"{mix}: queries per request {previous:.2f} -> "
+                f"{current:.2f}")
+    return regressions
@@ -0,0 +1,190 @@
+"""Load-test the API against a seeded synthetic organization.
+
+Run from the `app` directory with DB_* pointing at a throwaway Postgres
+that has the migrations applied:
+
+    python -m benchmarks.run --seed-org --output results.json
+    python -m benchmarks.run --baseline results.json
+
+By default the app is driven in-process through ASGI, which also lets the
+runner count SQL statements per request. Pass --url to load a running
+server instead; query counts are then not reported.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict
+
+import httpx
+from sqlalchemy import event, func, select
+
+from benchmarks.report import Sample, ScenarioResult, summarize, \
+    print_summary, compare
+from benchmarks.scenarios import MIXES, READS, WRITES, Request, plan
+from benchmarks.seed import OrgShape, SeededOrg, seed
+from database import Department, Position, Employee
+from database.base import engine, async_session_maker
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def _existing_org() -> SeededOrg:
+    async with async_session_maker() as session:
+        counts = [await session.scalar(select(func.max(model.id)))
+                  for model in (Department, Employee, Position)]
+    if not all(counts):
+        sys.exit("Database is empty, run with --seed-org first")
+    return SeededOrg(*counts)
+
+
+async def _send(client: httpx.AsyncClient, request: Request) -> int:
+    try:
+        response = await client.request(request.method, request.url,
+                                        json=request.json)
+    except httpx.HTTPError:
+        return 0
+    return response.status_code
+
+
+async def _run_scenario(client: httpx.AsyncClient, mix: str, count: int,
+                        org: SeededOrg, args, tag: str,
+                        counter: StatementCounter | None) -> ScenarioResult:
+    requests = iter(plan(mix, count, org, tag, args.seed))
+    result = ScenarioResult(mix=mix, duration=0.0)
+
+    async def worker():
+        for operation, request in requests:
+            started = time.perf_counter()
+            status = await _send(client, request)
+            result.samples.append(Sample(operation.name,
+                                         time.perf_counter() - started,
+                                         status))
+
+    queries_before = counter.count if counter else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.clients)))
+    result.duration = time.perf_counter() - started
+    if counter:
+        result.queries = counter.count - queries_before
+    return result
+
+
+async def _queries_per_operation(client: httpx.AsyncClient, org: SeededOrg,
+                                 tag: str, counter: StatementCounter,
+                                 samples: int, seed_value: int
+                                 ) -> dict[str, float]:
+    """Statements per request of each operation, measured one at a time."""
+    rng = random.Random(seed_value)
+    queries = {}
+    for operation in READS + WRITES:
+        before = counter.count
+        for _ in range(samples):
+            await _send(client, operation.build(rng, org, tag))
+        queries[operation.name] = (counter.count - before) / samples
+    return queries
+
+
+async def main(args) -> int:
+    if args.seed_org:
+        shape = OrgShape(depth=args.depth, fanout=args.fanout,
+                         employees=args.employees, positions=args.positions,
+                         seed=args.seed)
+        org = await seed(engine, shape)
+    else:
+        shape = None
+        org = await _existing_org()
+    tag = f'{time.time_ns():x}'
+
+    counter = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from main import app
+        counter = StatementCounter()
+        event.listen(engine.sync_engine, 'before_cursor_execute', counter)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                   base_url='http://bench',
+                                   timeout=args.timeout)
+
+    async with client:
+        queries_per_operation = {}
+        if counter:
+            queries_per_operation = await _queries_per_operation(
+                client, org, tag, counter, args.calibration, args.seed)
+        results = {
+            'meta': {
+                'started_at': time.time(),
+                'python': platform.python_version(),
+                'target': args.url or 'asgi',
+                'clients': args.clients,
+                'requests': args.requests,
+                'seed': args.seed,
+                'shape': asdict(shape) if shape else None,
+                'org': asdict(org),
+            },
+            'scenarios': {},
+        }
+        for mix in args.mix:
+            await _run_scenario(client, mix, args.warmup, org, args, tag,
+                                None)
+            scenario = await _run_scenario(client, mix, args.requests, org,
+                                           args, tag, counter)
+            results['scenarios'][mix] = summarize(scenario,
+                                                  queries_per_operation)
+    await engine.dispose()
+
+    print_summary(results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="base URL of a running server")
+    parser.add_argument('--seed-org', action='store_true',
+                        help="truncate all tables and seed a new org")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mix', nargs='+', choices=list(MIXES),
+                        default=list(MIXES))
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000,
+                        help="requests per scenario")
+    parser.add_argument('--warmup', type=int, default=200,
+                        help="unmeasured requests before each scenario")
+    parser.add_argument('--calibration', type=int, default=20,
+                        help="sequential samples per operation used to "
+                             "count statements")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="allowed regression as a fraction")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
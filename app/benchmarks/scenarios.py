@@ -0,0 +1,86 @@
+"""Operations the load generator sends and the mixes it runs."""
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from benchmarks.seed import SeededOrg
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    json: dict | None = None
+
+
+@dataclass
+class Operation:
+    name: str
+    write: bool
+    build: Callable[[random.Random, SeededOrg, str], Request]
+
+
+def _department(rng: random.Random, org: SeededOrg) -> int:
+    return rng.randint(1, org.departments)
+
+
+def _employee(rng: random.Random, org: SeededOrg) -> int:
+    return rng.randint(1, org.employees)
+
+
+def _position(rng: random.Random, org: SeededOrg) -> int:
+    return rng.randint(1, org.positions)
+
+
+READS = [
+    Operation('get_employee', False, lambda rng, org, tag: Request(
+        'GET', f'/api/employees/{_employee(rng, org)}')),
+    Operation('list_employees', False, lambda rng, org, tag: Request(
+        'GET', f'/api/employees?after={_employee(rng, org)}&limit=50')),
+    Operation('get_department', False, lambda rng, org, tag: Request(
+        'GET', f'/api/departments/{_department(rng, org)}')),
+    Operation('department_employees', False, lambda rng, org, tag: Request(
+        'GET', f'/api/departments/{_department(rng, org)}/employees')),
+    Operation('department_tree', False, lambda rng, org, tag: Request(
+        'GET', f'/api/departments/{_department(rng, org)}/tree?depth=2')),
+    Operation('employee_rights', False, lambda rng, org, tag: Request(
+        'GET', f'/api/employees/{_employee(rng, org)}/rights?inherit=true')),
+    Operation('search', False, lambda rng, org, tag: Request(
+        'GET', f'/api/search?q=Employee+{rng.randint(10, 99)}')),
+]
+
+WRITES = [
+    Operation('create_employee', True, lambda rng, org, tag: Request(
+        'POST', '/api/employee',
+        {'name': f'Bench {tag} {rng.getrandbits(48)}',
+         'department_id': _department(rng, org)})),
+    Operation('update_employee', True, lambda rng, org, tag: Request(
+        'PUT', f'/api/employee/{_employee(rng, org)}',
+        {'name': f'Bench {tag} {rng.getrandbits(48)}',
+         'department_id': _department(rng, org)})),
+    Operation('link_position', True, lambda rng, org, tag: Request(
+        'POST', '/api/positions/add_employee',
+        {'position_id': _position(rng, org),
+         'employee_id': _employee(rng, org)})),
+]
+
+# Share of write operations in each mix
+MIXES = {
+    'read-only': 0.0,
+    'read-heavy': 0.05,
+    'mixed': 0.2,
+    'write-heavy': 0.5,
+}
+
+
+def plan(mix: str, count: int, org: SeededOrg, tag: str,
+         seed: int) -> list[tuple[Operation, Request]]:
+    """The same arguments always produce the same request sequence."""
+    rng = random.Random(f'{seed}:{mix}')
+    write_share = MIXES[mix]
+    requests = []
+    for _ in range(count):
+        operations = WRITES if rng.random() < write_share else READS
+        operation = rng.choice(operations)
+        requests.append((operation, operation.build(rng, org, tag)))
+    return requests
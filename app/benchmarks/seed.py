@@ -0,0 +1,111 @@
+"""Seed a synthetic organization into the configured database.
+
+Every table of the app is truncated first, so point DB_* at a throwaway
+database. Generation is driven by a fixed random seed, which makes runs
+comparable with each other.
+"""
+import random
+from dataclasses import dataclass
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import Department, Position, Employee, employee_position, \
+    departament_position
+
+TABLES = ('change_log', 'employee_position', 'departament_position',
+          'department_closure', 'employees', 'positions', 'departments')
+
+RIGHTS = ('read', 'write', 'approve', 'admin', 'audit', 'hire', 'report')
+
+# Inserts are sent in chunks to stay below the bind parameter limit
+CHUNK = 5000
+
+
+@dataclass
+class OrgShape:
+    depth: int = 4
+    fanout: int = 5
+    employees: int = 10000
+    positions: int = 200
+    positions_per_department: int = 5
+    positions_per_employee: int = 2
+    seed: int = 42
+
+
+@dataclass
+class SeededOrg:
+    departments: int
+    employees: int
+    positions: int
+
+
+def _department_rows(shape: OrgShape) -> list[dict]:
+    rows = [{'id': 1, 'name': 'Department 1', 'parent_id': None}]
+    level = [1]
+    for _ in range(shape.depth):
+        next_level = []
+        for parent_id in level:
+            for _ in range(shape.fanout):
+                department_id = len(rows) + 1
+                rows.append({'id': department_id,
+                             'name': f'Department {department_id}',
+                             'parent_id': parent_id})
+                next_level.append(department_id)
+        level = next_level
+    return rows
+
+
+async def _insert(connection, table, rows: list[dict]):
+    for start in range(0, len(rows), CHUNK):
+        await connection.execute(insert(table), rows[start:start + CHUNK])
+
+
+async def seed(engine: AsyncEngine, shape: OrgShape) -> SeededOrg:
+    rng = random.Random(shape.seed)
+    departments = _department_rows(shape)
+    positions = [{'id': position_id, 'title': f'Position {position_id}',
+                  'rights': ' '.join(rng.sample(RIGHTS, rng.randint(1, 3)))}
+                 for position_id in range(1, shape.positions + 1)]
+    employees = [{'id': employee_id, 'name': f'Employee {employee_id}',
+                  'department_id': rng.randint(1, len(departments))}
+                 for employee_id in range(1, shape.employees + 1)]
+    department_links = [
+        {'departament_id': department['id'], 'position_id': position_id}
+        for department in departments
+        for position_id in rng.sample(range(1, shape.positions + 1),
+                                      shape.positions_per_department)]
+    employee_links = [
+        {'employee_id': employee['id'], 'position_id': position_id}
+        for employee in employees
+        for position_id in rng.sample(range(1, shape.positions + 1),
+                                      shape.positions_per_employee)]
+
+    async with engine.begin() as connection:
+        await connection.execute(text(
+            f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        await _insert(connection, Department.__table__, departments)
+        await _insert(connection, Position.__table__, positions)
+        await _insert(connection, Employee.__table__, employees)
+        await _insert(connection, departament_position, department_links)
+        await _insert(connection, employee_position, employee_links)
+        await connection.execute(text("""
+            WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM departments
+                UNION ALL
+                SELECT tree.ancestor_id, departments.id, tree.depth + 1
+                FROM departments
+                JOIN tree ON departments.parent_id = tree.descendant_id
+            )
+            INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, descendant_id, depth FROM tree
+        """))
+        for table in ('departments', 'positions', 'employees'):
+            await connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT max(id) FROM {table}))"))
+        await connection.execute(text(
+            'REFRESH MATERIALIZED VIEW department_stats'))
+        await connection.execute(text(f"ANALYZE {', '.join(TABLES)}"))
+    return SeededOrg(departments=len(departments), employees=len(employees),
+                     positions=len(positions))
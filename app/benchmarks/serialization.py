@@ -0,0 +1,106 @@
+"""CPU cost of encoding a list page: ORM objects vs row tuples.
+
+Compares the path list endpoints used before (ORM entities, a schema
+dump per object, `response_model` validation, `jsonable_encoder` and the
+stdlib encoder) with the current one (row tuples encoded by
+`rows_response`). Runs against an in-memory SQLite database, so no
+server is needed:
+
+    python -m benchmarks.serialization --rows 5000 --page 50 500
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, \
+    create_async_engine
+
+from api.expand import dump_expanded
+from api.responses import rows_response
+from database import Department, Employee
+from schemas.employee import EmployeeOutSchema
+from schemas.expand import EmployeeExpandedSchema, EMPLOYEE_RELATIONS
+
+
+async def _setup(rows: int) -> async_sessionmaker:
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as connection:
+        for table in (Department.__table__, Employee.__table__):
+            await connection.run_sync(table.create)
+        await connection.execute(insert(Department.__table__),
+                                 [{'id': 1, 'name': 'Department 1'}])
+        await connection.execute(insert(Employee.__table__), [
+            {'id': employee_id, 'name': f'Employee {employee_id}',
+             'department_id': 1} for employee_id in range(1, rows + 1)])
+    return async_sessionmaker(engine, expire_on_commit=False,
+                              class_=AsyncSession)
+
+
+async def orm_page(session: AsyncSession, page: int) -> bytes:
+    result = await session.execute(
+        select(Employee).order_by(Employee.id).limit(page))
+    employees = result.scalars().all()
+    content = [dump_expanded(employee, EmployeeOutSchema,
+                             EMPLOYEE_RELATIONS, [])
+               for employee in employees]
+    adapter = TypeAdapter(list[EmployeeExpandedSchema])
+    validated = adapter.dump_python(adapter.validate_python(content),
+                                    exclude_unset=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+async def row_page(session: AsyncSession, page: int) -> bytes:
+    result = await session.execute(
+        select(*Employee.__table__.columns).order_by(Employee.id).limit(page))
+    return rows_response(result.all(), EmployeeOutSchema, Response()).body
+
+
+async def _measure(session_maker: async_sessionmaker, encode, page: int,
+                   iterations: int) -> float:
+    """Pages encoded per second of CPU time."""
+    async with session_maker() as session:
+        await encode(session, page)
+        started = time.process_time()
+        for _ in range(iterations):
+            await encode(session, page)
+        return iterations / (time.process_time() - started)
+
+
+async def main(args):
+    session_maker = await _setup(max(args.rows, max(args.page)))
+    async with session_maker() as session:
+        assert json.loads(await orm_page(session, 10)) == \
+            json.loads(await row_page(session, 10))
+    results = {}
+    print(f"{'page':>6}{'orm pages/s':>14}{'row pages/s':>14}{'speedup':>10}")
+    for page in args.page:
+        before = await _measure(session_maker, orm_page, page,
+                                args.iterations)
+        after = await _measure(session_maker, row_page, page,
+                               args.iterations)
+        results[page] = {'orm_pages_per_cpu_second': before,
+                         'row_pages_per_cpu_second': after}
+        print(f"{page:>6}{before:>14.1f}{after:>14.1f}"
+              f"{after / before:>9.2f}x")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--page', type=int, nargs='+', default=[50, 500])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help="write results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
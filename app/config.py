@@ -13,3 +13,60 @@ DB_PORT = os.environ.get("DB_PORT")
 DB_NAME = os.environ.get("DB_NAME")
 DB_USER = os.environ.get("DB_USER")
 DB_PASS = os.environ.get("DB_PASS")
+
+# Sizes are per worker process: the server needs
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections at peak
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT = int(os.environ.get("DB_STATEMENT_TIMEOUT", 30000))
+DB_ECHO = os.environ.get("DB_ECHO", "false").lower() == "true"
+
+# "memory" keeps a per-worker LRU cache, "redis" shares one between workers
+# (install with the redis extra)
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.environ.get("CACHE_TTL", 60))
+CACHE_MAX_SIZE = int(os.environ.get("CACHE_MAX_SIZE", 10000))
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+# Optional in-process snapshot of the organization for traversal queries.
+# It follows the change feed; a full reload only runs after missed changes
+# and, when the interval is set, periodically as a safety net
+ORG_GRAPH_ENABLED = os.environ.get("ORG_GRAPH_ENABLED", "false").lower() == "true"
+ORG_GRAPH_REFRESH_INTERVAL = float(os.environ.get("ORG_GRAPH_REFRESH_INTERVAL", 0))
+
+# Opt-in refresh of the department_stats materialized view; one process
+# at a time refreshes it, after writes and every interval. Without it the
+# stats endpoints aggregate the tables on every request
+STATS_REFRESH_ENABLED = os.environ.get("STATS_REFRESH_ENABLED", "false").lower() == "true"
+STATS_REFRESH_INTERVAL = float(os.environ.get("STATS_REFRESH_INTERVAL", 60))
+
+# Opt-in per-request timing (Server-Timing header and log) and cProfile
+# dumps of a sampled fraction of requests
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", "profiles")
+
+# With several workers each one publishes its metrics into this directory
+# and /metrics merges them; unset, /metrics reports the serving worker only
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+# Comma-separated DSNs of read replicas (postgresql+asyncpg://...); reads
+# are spread over the healthy ones and fall back to the primary
+DB_REPLICA_URLS = [url.strip() for url in
+                   os.environ.get("DB_REPLICA_URLS", "").split(",")
+                   if url.strip()]
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", 10))
+DB_REPLICA_CHECK_TIMEOUT = float(os.environ.get("DB_REPLICA_CHECK_TIMEOUT", 2))
+# Seconds a client keeps reading from the primary after a write
+READ_YOUR_WRITES_WINDOW = int(os.environ.get("READ_YOUR_WRITES_WINDOW", 5))
+
+# Production launcher (serve.py); workers default to the usable CPU count
+WEB_HOST = os.environ.get("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.environ.get("WEB_PORT", 8000))
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 0))
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+RUN_MIGRATIONS = os.environ.get("RUN_MIGRATIONS", "true").lower() == "true"
@@ -5,7 +5,10 @@ __all__ = (
     "Employee",
     "employee_position",
     "departament_position",
+    "department_closure",
+    "ChangeLog",
 )
 
 from .base import Base
-from .models import Department, employee_position, Position, Employee, departament_position
\ No newline at end of file
+from .models import Department, employee_position, Position, Employee, departament_position, \
+    department_closure, ChangeLog
\ No newline at end of file
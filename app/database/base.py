@@ -1,10 +1,13 @@
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, \
-    create_async_engine, AsyncAttrs
+    create_async_engine, AsyncAttrs, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import MetaData
 
-from config import DB_USER, DB_PASS, DB_PORT, DB_NAME, DB_HOST
+from config import DB_USER, DB_PASS, DB_PORT, DB_NAME, DB_HOST, DB_ECHO, \
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, \
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT
+from .pool import InstrumentedQueuePool
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
@@ -25,7 +28,23 @@ class Base(DeclarativeBase, AsyncAttrs):
     )
 
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def build_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT)}
+        },
+    )
+
+
+engine = build_engine(DATABASE_URL)
 
 async_session_maker = async_sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
@@ -0,0 +1,185 @@
+from contextlib import nullcontext
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import Position, Employee
+from database.changes import record_changes
+from database.crud import create_department_crud, delete_department_crud, \
+    add_department_position, delete_department_position, \
+    create_position_crud, update_position_crud, delete_position_crud, \
+    add_employee_crud, delete_position_employee, create_employee_crud, \
+    update_employee_crud, delete_employee_crud, invalidate_pending, \
+    discard_pending
+from schemas.batch import BatchInSchema, BatchOperationSchema, \
+    BatchOutSchema, BatchResultSchema
+from schemas.department import DepartmentInSchema, DepartmentPositionSchema
+from schemas.employee import EmployeeInSchema
+from schemas.position import PositionInSchema, PositionEmployeeSchema
+
+STATUS_CODES = {
+    'create': 201,
+    'update': 202,
+    'delete': 204,
+    'link': 201,
+    'unlink': 204,
+}
+
+# Payload schema for every supported (entity, op) pair; None means the
+# operation only needs an id.
+PAYLOADS: dict[tuple[str, str], type[BaseModel] | None] = {
+    ('employee', 'create'): EmployeeInSchema,
+    ('employee', 'update'): EmployeeInSchema,
+    ('employee', 'delete'): None,
+    ('position', 'create'): PositionInSchema,
+    ('position', 'update'): PositionInSchema,
+    ('position', 'delete'): None,
+    ('position', 'link'): PositionEmployeeSchema,
+    ('position', 'unlink'): PositionEmployeeSchema,
+    ('department', 'create'): DepartmentInSchema,
+    ('department', 'delete'): None,
+    ('department', 'link'): DepartmentPositionSchema,
+    ('department', 'unlink'): DepartmentPositionSchema,
+}
+
+# Entities whose consecutive creates are sent as one multi-row INSERT
+BULK_CREATE = {
+    'employee': (Employee,
+                 "Employee already exists or department not exists"),
+    'position': (Position, "Position already exists"),
+}
+
+
+def _validate(operation: BatchOperationSchema) -> BaseModel | None:
+    key = (operation.entity, operation.op)
+    if key not in PAYLOADS:
+        raise HTTPException(status_code=422, detail="Unsupported operation")
+    if operation.op in ('update', 'delete') and operation.id is None:
+        raise HTTPException(status_code=422, detail="Operation id is required")
+    schema = PAYLOADS[key]
+    if schema is None:
+        return None
+    try:
+        return schema.model_validate(operation.data)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+async def _run_operation(operation: BatchOperationSchema, data,
+                         session: AsyncSession) -> int:
+    """Apply one operation without committing.
+
+    Returns the id reported back to the client. Cache invalidations are
+    left pending on the session until `run_batch` commits.
+    """
+    entity, op, object_id = operation.entity, operation.op, operation.id
+    if op == 'create':
+        creators = {'employee': create_employee_crud,
+                    'position': create_position_crud,
+                    'department': create_department_crud}
+        created = await creators[entity](data, session, commit=False)
+        return created.id
+    if op == 'update' and entity == 'employee':
+        await update_employee_crud(object_id, data, session, commit=False)
+    elif op == 'update':
+        await update_position_crud(object_id, data, session, commit=False)
+    elif op == 'delete':
+        deleters = {'employee': delete_employee_crud,
+                    'position': delete_position_crud,
+                    'department': delete_department_crud}
+        await deleters[entity](object_id, session, commit=False)
+    elif entity == 'position':
+        linker = add_employee_crud if op == 'link' \
+            else delete_position_employee
+        await linker(data, session, commit=False)
+        return data.position_id
+    else:
+        linker = add_department_position if op == 'link' \
+            else delete_department_position
+        await linker(data, session, commit=False)
+        return data.department_id
+    return object_id
+
+
+async def _bulk_create(entity: str, rows: list[BaseModel],
+                       session: AsyncSession) -> list[int]:
+    model, detail = BULK_CREATE[entity]
+    query = insert(model).returning(model.id, sort_by_parameter_order=True)
+    values = [row.model_dump() for row in rows]
+    try:
+        ids = list(await session.scalars(query, values))
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail=detail)
+    await record_changes(session, entity, 'create', zip(ids, values))
+    return ids
+
+
+def _create_group_end(operations: list[BatchOperationSchema],
+                      start: int) -> int:
+    first = operations[start]
+    end = start + 1
+    if first.op != 'create' or first.entity not in BULK_CREATE:
+        return end
+    while end < len(operations) and operations[end].op == 'create' and \
+            operations[end].entity == first.entity:
+        end += 1
+    return end
+
+
+async def run_batch(batch: BatchInSchema,
+                    session: AsyncSession) -> BatchOutSchema:
+    """Apply the operations in order inside a single transaction.
+
+    Atomic batches stop at the first failure and roll everything back;
+    consecutive creates of the same entity are inserted with one statement.
+    Non-atomic batches run each operation in a savepoint and commit the
+    ones that succeeded.
+    """
+    operations = batch.operations
+    results: list[BatchResultSchema] = []
+    index = 0
+    while index < len(operations):
+        end = _create_group_end(operations, index) if batch.atomic \
+            else index + 1
+        group = operations[index:end]
+        try:
+            payloads = [_validate(operation) for operation in group]
+            if len(group) > 1:
+                ids = await _bulk_create(group[0].entity, payloads, session)
+                results.extend(BatchResultSchema(status=201, id=object_id)
+                               for object_id in ids)
+            else:
+                scope = nullcontext() if batch.atomic \
+                    else session.begin_nested()
+                async with scope:
+                    object_id = await _run_operation(group[0], payloads[0],
+                                                     session)
+                results.append(BatchResultSchema(
+                    status=STATUS_CODES[group[0].op], id=object_id))
+        except (HTTPException, IntegrityError) as exc:
+            if isinstance(exc, IntegrityError):
+                exc = HTTPException(status_code=400,
+                                    detail="Operation violates a database "
+                                           "constraint")
+            if not batch.atomic:
+                results.append(BatchResultSchema(status=exc.status_code,
+                                                 detail=exc.detail))
+                index = end
+                continue
+            await session.rollback()
+            discard_pending(session)
+            results.extend(BatchResultSchema(status=exc.status_code,
+                                             detail=exc.detail)
+                           for _ in group)
+            results.extend(BatchResultSchema(
+                status=424, detail="Skipped after an earlier failure")
+                for _ in operations[end:])
+            return BatchOutSchema(committed=False, results=results)
+        index = end
+
+    await session.commit()
+    await invalidate_pending(session)
+    return BatchOutSchema(committed=True, results=results)
@@ -0,0 +1,219 @@
+import csv
+from typing import AsyncIterator, Iterable
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.cache import invalidate_all
+from database.changes import record_change
+from database.crud import lock_hierarchy
+from schemas.bulk import BulkImportResultSchema
+from schemas.department import DepartmentInSchema
+from schemas.employee import EmployeeInSchema
+from schemas.position import PositionInSchema
+
+EMPLOYEE_UPSERT = """
+WITH checked AS (
+    SELECT s.*, s.department_id IS NULL OR EXISTS (
+        SELECT 1 FROM departments d WHERE d.id = s.department_id) AS ok
+    FROM bulk_staging s
+), upserted AS (
+    INSERT INTO employees (name, department_id)
+    SELECT DISTINCT ON (name) name, department_id FROM checked
+    WHERE ok ORDER BY name, ord DESC
+    ON CONFLICT (name) DO UPDATE SET department_id = EXCLUDED.department_id,
+        version = employees.version + 1
+    WHERE employees.department_id IS DISTINCT FROM EXCLUDED.department_id
+    RETURNING xmax = 0 AS inserted
+)
+SELECT (SELECT count(*) FROM upserted WHERE inserted),
+       (SELECT count(*) FROM upserted WHERE NOT inserted),
+       (SELECT count(*) FROM checked WHERE NOT ok)
+"""
+
+POSITION_UPSERT = """
+WITH upserted AS (
+    INSERT INTO positions (title, rights)
+    SELECT DISTINCT ON (title) title, rights FROM bulk_staging
+    ORDER BY title, ord DESC
+    ON CONFLICT (title) DO UPDATE SET rights = EXCLUDED.rights,
+        version = positions.version + 1
+    WHERE positions.rights IS DISTINCT FROM EXCLUDED.rights
+    RETURNING xmax = 0 AS inserted
+)
+SELECT (SELECT count(*) FROM upserted WHERE inserted),
+       (SELECT count(*) FROM upserted WHERE NOT inserted),
+       0
+"""
+
+# A parent must already exist and must not lie inside the department's own
+# subtree, otherwise the update would create a cycle.
+DEPARTMENT_UPSERT = """
+WITH checked AS (
+    SELECT s.*, (s.parent_id IS NULL OR EXISTS (
+        SELECT 1 FROM departments d WHERE d.id = s.parent_id)) AND NOT EXISTS (
+        SELECT 1 FROM departments d
+        JOIN department_closure c ON c.ancestor_id = d.id
+        WHERE d.name = s.name AND c.descendant_id = s.parent_id) AS ok
+    FROM bulk_staging s
+), upserted AS (
+    INSERT INTO departments (name, parent_id)
+    SELECT DISTINCT ON (name) name, parent_id FROM checked
+    WHERE ok ORDER BY name, ord DESC
+    ON CONFLICT (name) DO UPDATE SET parent_id = EXCLUDED.parent_id,
+        version = departments.version + 1
+    WHERE departments.parent_id IS DISTINCT FROM EXCLUDED.parent_id
+    RETURNING xmax = 0 AS inserted
+)
+SELECT (SELECT count(*) FROM upserted WHERE inserted),
+       (SELECT count(*) FROM upserted WHERE NOT inserted),
+       (SELECT count(*) FROM checked WHERE NOT ok)
+"""
+
+# The check above only sees the hierarchy from before the import, so rows of
+# one batch can still point at each other. Walk up from every imported
+# department and report the ones that come back to a department already on
+# their path.
+DEPARTMENT_CYCLES = """
+WITH RECURSIVE walk (name, parent_id, path, cycle) AS (
+    SELECT d.name, d.parent_id, ARRAY[d.id], false
+    FROM departments d
+    WHERE d.parent_id IS NOT NULL
+      AND d.name IN (SELECT name FROM bulk_staging)
+    UNION ALL
+    SELECT walk.name, d.parent_id, walk.path || d.id, d.id = ANY(walk.path)
+    FROM walk
+    JOIN departments d ON d.id = walk.parent_id
+    WHERE NOT walk.cycle
+)
+SELECT DISTINCT name FROM walk WHERE cycle ORDER BY name
+"""
+
+REBUILD_DEPARTMENT_CLOSURE = """
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM departments
+    UNION ALL
+    SELECT tree.ancestor_id, departments.id, tree.depth + 1
+    FROM departments
+    JOIN tree ON departments.parent_id = tree.descendant_id
+)
+INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+
+class _Rejected:
+    def __init__(self):
+        self.count = 0
+
+
+async def _split_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line.decode()
+    if buffer:
+        yield buffer.decode()
+
+
+async def _parse_records(chunks: AsyncIterator[bytes], fmt: str,
+                         schema: type[BaseModel], columns: Iterable[str],
+                         rejected: _Rejected) -> AsyncIterator[tuple]:
+    """Validate an NDJSON or CSV body line by line and yield COPY records.
+
+    CSV input must have a header row; quoted values may not span lines.
+    """
+    header = None
+    async for line in _split_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            if fmt == 'ndjson':
+                row = schema.model_validate_json(line)
+            else:
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = values
+                    continue
+                row = schema.model_validate(
+                    {key: value for key, value in zip(header, values)
+                     if value != ''})
+        except (ValidationError, csv.Error):
+            rejected.count += 1
+            continue
+        yield tuple(getattr(row, column) for column in columns)
+
+
+async def _bulk_upsert(chunks: AsyncIterator[bytes], fmt: str,
+                       schema: type[BaseModel], staging: str,
+                       columns: tuple[str, ...], upsert: str,
+                       session: AsyncSession) -> BulkImportResultSchema:
+    await session.execute(text(
+        f"CREATE TEMP TABLE bulk_staging (ord bigserial, {staging}) "
+        f"ON COMMIT DROP"))
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    rejected = _Rejected()
+    await raw_connection.driver_connection.copy_records_to_table(
+        'bulk_staging', columns=columns,
+        records=_parse_records(chunks, fmt, schema, columns, rejected))
+    result = await session.execute(text(upsert))
+    inserted, updated, not_matched = result.one()
+    return BulkImportResultSchema(inserted=inserted, updated=updated,
+                                  rejected=rejected.count + not_matched)
+
+
+async def bulk_import_employees(chunks: AsyncIterator[bytes], fmt: str,
+                                session: AsyncSession) -> \
+        BulkImportResultSchema:
+    result = await _bulk_upsert(chunks, fmt, EmployeeInSchema,
+                                'name text, department_id integer',
+                                ('name', 'department_id'), EMPLOYEE_UPSERT,
+                                session)
+    await record_change(session, 'employee', 'import',
+                        data=result.model_dump())
+    await session.commit()
+    await invalidate_all('employee')
+    return result
+
+
+async def bulk_import_positions(chunks: AsyncIterator[bytes], fmt: str,
+                                session: AsyncSession) -> \
+        BulkImportResultSchema:
+    result = await _bulk_upsert(chunks, fmt, PositionInSchema,
+                                'title text, rights text',
+                                ('title', 'rights'), POSITION_UPSERT, session)
+    await record_change(session, 'position', 'import',
+                        data=result.model_dump())
+    await session.commit()
+    await invalidate_all('position')
+    return result
+
+
+async def bulk_import_departments(chunks: AsyncIterator[bytes], fmt: str,
+                                  session: AsyncSession) -> \
+        BulkImportResultSchema:
+    # Moves and deletes must not change the hierarchy while it is checked
+    await lock_hierarchy(session)
+    result = await _bulk_upsert(chunks, fmt, DepartmentInSchema,
+                                'name text, parent_id integer',
+                                ('name', 'parent_id'), DEPARTMENT_UPSERT,
+                                session)
+    cycles = list(await session.scalars(text(DEPARTMENT_CYCLES)))
+    if cycles:
+        await session.rollback()
+        raise HTTPException(status_code=400,
+                            detail="Import would create a cycle through "
+                                   "departments: " + ', '.join(cycles))
+    # Parents may have changed anywhere in the batch, rebuild the hierarchy
+    await session.execute(text("DELETE FROM department_closure"))
+    await session.execute(text(REBUILD_DEPARTMENT_CLOSURE))
+    await record_change(session, 'department', 'import',
+                        data=result.model_dump())
+    await session.commit()
+    await invalidate_all('department')
+    return result
@@ -0,0 +1,196 @@
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import CACHE_BACKEND, CACHE_TTL, CACHE_MAX_SIZE, REDIS_URL
+from database.changes import change_feed
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+class MemoryCache:
+    """Per-process LRU cache with a time-to-live for every entry.
+
+    Writes made through other workers are evicted from the change feed.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        self.discard(*keys)
+
+    async def clear(self, prefix: str):
+        self.discard_prefix(prefix)
+
+    def discard(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def discard_prefix(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisCache:
+    """Shared cache on any client with the redis.asyncio interface."""
+
+    def __init__(self, client, ttl: int):
+        self.client = client
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.client.get(key)
+        return None if value is None else json.loads(value)
+
+    async def set(self, key: str, value: Any):
+        await self.client.set(key, json.dumps(value), ex=self.ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*keys)
+
+    async def clear(self, prefix: str):
+        keys = [key async for key in self.client.scan_iter(match=f"{prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class NullCache:
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, value: Any):
+        pass
+
+    async def delete(self, *keys: str):
+        pass
+
+    async def clear(self, prefix: str):
+        pass
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def build_cache(backend: str = CACHE_BACKEND):
+    if backend == "none":
+        return NullCache()
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        return RedisCache(redis.from_url(REDIS_URL), CACHE_TTL)
+    return MemoryCache(CACHE_MAX_SIZE, CACHE_TTL)
+
+
+cache = build_cache()
+stats = CacheStats()
+
+# Callbacks `(namespace, object_ids)` run on every invalidation so derived
+# in-process state can follow the same write paths; object_ids is None
+# when the whole namespace is dropped.
+invalidation_listeners: list[Callable[[str, Optional[tuple[int, ...]]],
+                                      None]] = []
+
+
+def cache_key(namespace: str, object_id: int) -> str:
+    return f"{namespace}:{object_id}"
+
+
+async def invalidate(namespace: str, *object_ids: int):
+    await cache.delete(*(cache_key(namespace, object_id)
+                         for object_id in object_ids))
+    for listener in invalidation_listeners:
+        listener(namespace, object_ids)
+
+
+async def invalidate_all(namespace: str):
+    await cache.clear(f"{namespace}:")
+    for listener in invalidation_listeners:
+        listener(namespace, None)
+
+
+def cached(namespace: str, schema: type[BaseModel]):
+    """Cache the serialized result of a `(object_id, session)` read function.
+
+    Entries are `{"version": ..., "data": ...}` dicts so callers can build
+    an ETag without touching the data. Only found objects are cached; a
+    missing object raises as usual.
+    """
+    def decorator(func: Callable[[int, AsyncSession], Awaitable[Any]]):
+        @functools.wraps(func)
+        async def wrapper(object_id: int, session: AsyncSession) -> dict:
+            key = cache_key(namespace, object_id)
+            value = await cache.get(key)
+            if value is not None:
+                stats.hits += 1
+                return value
+            stats.misses += 1
+            result = await func(object_id, session)
+            data = schema.model_validate(result,
+                                         from_attributes=True).model_dump()
+            value = {"version": result.version, "data": data}
+            await cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def _changed_keys(event: dict) -> list[str]:
+    entity, data = event['entity'], event['data'] or {}
+    if entity == 'employee_position':
+        return [cache_key('employee', data['employee_id']),
+                cache_key('position', data['position_id'])]
+    if entity == 'department_position':
+        return [cache_key('department', data['department_id']),
+                cache_key('position', data['position_id'])]
+    return [cache_key(entity, event['id'])]
+
+
+def _on_change(event: Optional[dict]):
+    """Evict what another worker changed; everything after missed changes."""
+    if event is None:
+        cache.discard_prefix('')
+    elif event['id'] is None and event['entity'] in \
+            ('employee', 'position', 'department'):
+        # Bulk imports are logged without an object id
+        cache.discard_prefix(f"{event['entity']}:")
+    else:
+        cache.discard(*_changed_keys(event))
+
+
+if isinstance(cache, MemoryCache):
+    change_feed.listeners.append(_on_change)
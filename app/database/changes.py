@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+import asyncpg
+from sqlalchemy import insert, select, func, cast, case, Text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS
+from database import ChangeLog
+from database.base import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+CHANGES_CHANNEL = 'org_changes'
+# Bytes of row data sent along with a notification; NOTIFY rejects payloads
+# of 8000 bytes, so larger data is left out and read back from the log
+NOTIFY_DATA_LIMIT = 7000
+
+# Events a slow subscriber may fall behind by before it resyncs from the log
+SUBSCRIBER_QUEUE_SIZE = 1000
+# Seconds between SSE comments that keep idle connections open
+KEEPALIVE_INTERVAL = 15
+RECONNECT_DELAY = 1.0
+BACKFILL_PAGE_SIZE = 1000
+# Sequence numbers below the highest one sent that a backfill reads again:
+# a transaction can take a lower number and commit after a higher one
+BACKFILL_LOOKBACK = 1000
+# Recently sent sequence numbers remembered to drop backfill duplicates;
+# must cover the lookback
+SENT_WINDOW = 10000
+
+
+async def record_changes(session: AsyncSession, entity: str, op: str,
+                         changes: Iterable[tuple[Optional[int],
+                                                 Optional[dict]]]):
+    """Append `(object_id, data)` changes to the log and NOTIFY them.
+
+    Both happen in the caller's transaction, so listeners only hear about
+    changes that were committed. Notifications leave out data over
+    `NOTIFY_DATA_LIMIT`; the feed reads it back from the log.
+    """
+    rows = [{'entity': entity, 'op': op, 'object_id': object_id,
+             'data': data} for object_id, data in changes]
+    if not rows:
+        return
+    change = insert(ChangeLog).values(rows).returning(
+        ChangeLog.id, ChangeLog.entity, ChangeLog.op, ChangeLog.object_id,
+        ChangeLog.data, ChangeLog.created_at).cte('change')
+    header = ('seq', change.c.id, 'entity', change.c.entity,
+              'op', change.c.op, 'id', change.c.object_id,
+              'created_at', change.c.created_at)
+    size = func.coalesce(func.octet_length(cast(change.c.data, Text)), 0)
+    payload = case(
+        (size <= NOTIFY_DATA_LIMIT,
+         func.json_build_object(*header, 'data', change.c.data)),
+        else_=func.json_build_object(*header))
+    await session.execute(select(
+        func.pg_notify(CHANGES_CHANNEL, cast(payload, Text))))
+
+
+async def record_change(session: AsyncSession, entity: str, op: str,
+                        object_id: Optional[int] = None,
+                        data: Optional[dict] = None):
+    await record_changes(session, entity, op, [(object_id, data)])
+
+
+def _change_dict(change: ChangeLog) -> dict:
+    return {'seq': change.id, 'entity': change.entity, 'op': change.op,
+            'id': change.object_id, 'data': change.data,
+            'created_at': change.created_at.isoformat()}
+
+
+async def list_changes(since: int, limit: int,
+                       session: AsyncSession) -> list[dict]:
+    query = select(ChangeLog).where(ChangeLog.id > since).order_by(
+        ChangeLog.id).limit(limit)
+    changes = await session.scalars(query)
+    return [_change_dict(change) for change in changes]
+
+
+class Subscription:
+    def __init__(self):
+        self.queue: asyncio.Queue[Optional[dict]] = asyncio.Queue(
+            SUBSCRIBER_QUEUE_SIZE)
+        # Set when events may have been missed; the reader then catches up
+        # from the change log
+        self.gap = False
+
+    def push(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.gap = True
+
+    def mark_gap(self):
+        self.gap = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class ChangeFeed:
+    """Fans NOTIFY events out to the subscribers of the current worker.
+
+    A single dedicated LISTEN connection is kept per worker, outside the
+    pool, and re-established after failures. Events are dispatched in
+    arrival order by one task, which reads data left out of a notification
+    back from the log first.
+    """
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Received events, and None where changes may have been missed
+        self._events: Optional[asyncio.Queue[Optional[dict]]] = None
+        # Called with every change committed by any worker, and with None
+        # when changes may have been missed while reconnecting
+        self.listeners: list[Callable[[Optional[dict]], None]] = []
+
+    async def start(self):
+        self._events = asyncio.Queue()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        for task in (self._task, self._dispatcher):
+            if task is not None:
+                task.cancel()
+        self._task = self._dispatcher = None
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription()
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def _notify_listeners(self, event: Optional[dict]):
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Change listener failed")
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        self._events.put_nowait(json.loads(payload))
+
+    async def _load(self, event: dict) -> Optional[dict]:
+        try:
+            async with async_session_maker() as session:
+                change = await session.get(ChangeLog, event['seq'])
+        except Exception:
+            logger.exception("Reading change %s failed", event['seq'])
+            return None
+        return None if change is None else _change_dict(change)
+
+    async def _dispatch(self):
+        while True:
+            event = await self._events.get()
+            if event is not None and 'data' not in event:
+                event = await self._load(event)
+            if event is None:
+                for subscription in self._subscribers:
+                    subscription.mark_gap()
+            else:
+                for subscription in self._subscribers:
+                    subscription.push(event)
+            self._notify_listeners(event)
+
+    async def _listen(self):
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    host=DB_HOST, port=DB_PORT, database=DB_NAME,
+                    user=DB_USER, password=DB_PASS)
+            except Exception:
+                logger.exception("Change feed connection failed")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(CHANGES_CHANNEL,
+                                              self._on_notify)
+                # Anything committed while not listening is only in the log
+                self._events.put_nowait(None)
+                await closed.wait()
+                logger.warning("Change feed connection lost")
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+change_feed = ChangeFeed()
+
+
+def _sse(event: dict) -> str:
+    return (f"id: {event['seq']}\nevent: change\n"
+            f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+
+
+async def stream_changes(since: Optional[int]) -> AsyncIterator[str]:
+    """SSE stream of changes after `since`, or of new ones when it is None.
+
+    Changes are delivered in commit order, so a transaction that took a
+    lower sequence number but committed later still gets through. The log
+    backfill after a gap re-reads the last `BACKFILL_LOOKBACK` sequence
+    numbers for the same reason, never going back past where the stream
+    started.
+    """
+    subscription = change_feed.subscribe()
+    sent = set()
+    sent_order = deque()
+    last_seq = since
+    # Lowest sequence number a backfill may return
+    floor = since
+
+    def remember(seq: int):
+        sent.add(seq)
+        sent_order.append(seq)
+        if len(sent_order) > SENT_WINDOW:
+            sent.discard(sent_order.popleft())
+
+    async def backfill() -> AsyncIterator[str]:
+        nonlocal last_seq
+        cursor = max(floor, last_seq - BACKFILL_LOOKBACK)
+        while True:
+            async with async_session_maker() as session:
+                changes = await list_changes(cursor, BACKFILL_PAGE_SIZE,
+                                             session)
+            for event in changes:
+                cursor = event['seq']
+                if event['seq'] not in sent:
+                    remember(event['seq'])
+                    last_seq = max(last_seq, event['seq'])
+                    yield _sse(event)
+            if len(changes) < BACKFILL_PAGE_SIZE:
+                return
+
+    try:
+        yield f"retry: {RECONNECT_DELAY * 1000:.0f}\n\n"
+        if since is not None:
+            async for message in backfill():
+                yield message
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(),
+                                               KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if subscription.gap:
+                subscription.gap = False
+                if last_seq is not None:
+                    async for message in backfill():
+                        yield message
+            if event is None or event['seq'] in sent:
+                continue
+            remember(event['seq'])
+            if floor is None:
+                floor = event['seq'] - 1
+            last_seq = max(last_seq or 0, event['seq'])
+            yield _sse(event)
+    finally:
+        change_feed.unsubscribe(subscription)
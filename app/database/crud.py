@@ -1,19 +1,106 @@
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, literal, insert, delete, update, exists, \
+    true, func, case, or_, union_all, literal_column, any_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
 
-from database import Department, Position, Employee, employee_position, departament_position
-from schemas.department import DepartmentInSchema, DepartmentPositionSchema
-from schemas.employee import EmployeeInSchema
-from schemas.position import PositionInSchema, PositionEmployeeSchema
+from database.cache import cached, invalidate
+from database.changes import record_change, record_changes
+from database.rights import get_rights_masks, registry
+from database import Department, Position, Employee, employee_position, departament_position, \
+    department_closure
+from schemas.department import DepartmentInSchema, DepartmentPositionSchema, \
+    DepartmentOutSchema, DeleteStrategy
+from schemas.employee import EmployeeInSchema, EmployeeOutSchema, \
+    EmployeeReassignSchema
+from schemas.pagination import PageSchema
+from schemas.position import PositionInSchema, PositionEmployeeSchema, \
+    PositionOutSchema
+
+# Advisory lock key taken by transactions that change the hierarchy
+HIERARCHY_LOCK_KEY = 0x6f7267
+# Session.info key of invalidations waiting for the caller's commit
+PENDING_INVALIDATIONS = 'pending_invalidations'
+
+
+def _paginate(query, column, page: PageSchema):
+    if page.after is not None:
+        query = query.where(column > page.after)
+    return query.order_by(column).limit(page.limit + 1)
+
+
+def _split_page(items: list, page: PageSchema) -> tuple[list, int | None]:
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        return items, items[-1].id
+    return items, None
+
+
+def _expand(model, expand: list[str]) -> list:
+    """Eager-load the requested relationships with one IN query each."""
+    return [selectinload(getattr(model, name)) for name in expand]
+
+
+def _list_query(model, expand: list[str]):
+    if expand:
+        return select(model).options(*_expand(model, expand))
+    # Plain pages are read as row tuples, skipping ORM object construction
+    return select(*model.__table__.columns)
+
+
+def _fetch(result, expand: list[str]) -> list:
+    return result.scalars().all() if expand else result.all()
+
+
+async def lock_hierarchy(session: AsyncSession):
+    """Serialize department moves and deletes until the transaction ends.
+
+    Without it two concurrent moves could each pass the cycle check and
+    then form a cycle together.
+    """
+    await session.execute(select(func.pg_advisory_xact_lock(
+        HIERARCHY_LOCK_KEY)))
+
+
+async def _commit(session: AsyncSession, commit: bool):
+    """Commit, or only flush when the caller owns the transaction."""
+    if commit:
+        await session.commit()
+    else:
+        await session.flush()
+
+
+async def _invalidate(session: AsyncSession, commit: bool, namespace: str,
+                      *object_ids: int):
+    """Invalidate now, or once the caller owning the transaction commits.
+
+    Evicting before the commit would let a concurrent read cache the old
+    rows again, and a rolled back transaction changed nothing.
+    """
+    if commit:
+        await invalidate(namespace, *object_ids)
+    else:
+        session.info.setdefault(PENDING_INVALIDATIONS, []).append(
+            (namespace, object_ids))
+
+
+async def invalidate_pending(session: AsyncSession):
+    """Run the invalidations deferred by `commit=False` calls."""
+    for namespace, object_ids in session.info.pop(PENDING_INVALIDATIONS, ()):
+        await invalidate(namespace, *object_ids)
+
+
+def discard_pending(session: AsyncSession):
+    session.info.pop(PENDING_INVALIDATIONS, None)
 
 
 # Department CRUD
-async def get_department_by_id(department_id: int,
-                               session: AsyncSession) -> Department:
-    query = select(Department).where(Department.id == department_id)
+async def get_department_by_id(department_id: int, session: AsyncSession,
+                               expand: list[str] = ()) -> Department:
+    query = select(Department).options(
+        *_expand(Department, expand)).where(Department.id == department_id)
     department = await session.execute(query)
     result = department.scalar_one_or_none()
     if result is None:
@@ -21,73 +108,354 @@ async def get_department_by_id(department_id: int,
     return result
 
 
+get_department_cached = cached('department',
+                               DepartmentOutSchema)(get_department_by_id)
+
+
 async def create_department_crud(data: DepartmentInSchema,
-                                 session: AsyncSession) -> Department:
-    department = Department(name=data.name, parent_id=data.parent_id)
-    session.add(department)
+                                 session: AsyncSession,
+                                 commit: bool = True) -> Department:
+    query = insert(Department).values(
+        name=data.name, parent_id=data.parent_id).returning(Department)
     try:
-        await session.commit()
+        department = await session.scalar(query)
+        await session.execute(
+            _insert_closure_paths(department.id, data.parent_id))
+        await record_change(session, 'department', 'create', department.id,
+                            {'name': department.name,
+                             'parent_id': department.parent_id})
+        await _commit(session, commit)
     except IntegrityError:
         raise HTTPException(status_code=400,
                             detail="Department already exists or parent is not found")
-
-    await session.refresh(department)
+    await _invalidate(session, commit, 'department', department.id)
     return department
 
 
-async def delete_department_crud(department_id: int, session: AsyncSession):
-    query = select(Department).where(Department.id == department_id)
-    department = await session.execute(query)
-    result = department.scalar_one_or_none()
-    if result is None:
+async def delete_department_crud(department_id: int, session: AsyncSession,
+                                 commit: bool = True,
+                                 strategy: DeleteStrategy = 'orphan'):
+    """Delete a department with a fixed number of set-based statements.
+
+    `orphan` turns its children into roots and detaches its employees,
+    `reparent-to-parent` hands children and employees to its parent and
+    `cascade` deletes the whole subtree, detaching every employee in it.
+    Employees themselves are never deleted.
+    """
+    await lock_hierarchy(session)
+    department = (await session.execute(select(Department.parent_id).where(
+        Department.id == department_id))).one_or_none()
+    if department is None:
         raise HTTPException(status_code=404, detail="Department not found")
-    delete = await session.delete(result)
-    await session.commit()
-    return delete
+    subtree = select(department_closure.c.descendant_id).where(
+        department_closure.c.ancestor_id == department_id)
+    ancestors = select(department_closure.c.ancestor_id).where(
+        department_closure.c.descendant_id == department_id)
+    if strategy == 'cascade':
+        removed = (await session.scalars(subtree)).all()
+    else:
+        removed = [department_id]
+    target_id = department.parent_id \
+        if strategy == 'reparent-to-parent' else None
+    removed_ids = any_(literal(removed, ARRAY(Integer)))
+
+    moved = (await session.scalars(
+        update(Employee).where(Employee.department_id == removed_ids).values(
+            department_id=target_id, version=Employee.version + 1).returning(
+            Employee.id).execution_options(synchronize_session=False))).all()
+    await session.execute(delete(departament_position).where(
+        departament_position.c.departament_id == removed_ids))
+    children = []
+    if strategy == 'cascade':
+        await session.execute(delete(department_closure).where(
+            department_closure.c.descendant_id == removed_ids))
+    else:
+        children = (await session.scalars(
+            update(Department).where(
+                Department.parent_id == department_id).values(
+                parent_id=target_id,
+                version=Department.version + 1).returning(
+                Department.id).execution_options(
+                synchronize_session=False))).all()
+        if strategy == 'reparent-to-parent':
+            # Paths through the deleted department get one step shorter
+            await session.execute(update(department_closure).where(
+                department_closure.c.ancestor_id.in_(ancestors),
+                department_closure.c.ancestor_id != department_id,
+                department_closure.c.descendant_id.in_(subtree),
+                department_closure.c.descendant_id != department_id).values(
+                depth=department_closure.c.depth - 1))
+            await session.execute(delete(department_closure).where(or_(
+                department_closure.c.ancestor_id == department_id,
+                department_closure.c.descendant_id == department_id)))
+        else:
+            # Cut every path entering the subtree from above
+            await session.execute(delete(department_closure).where(
+                department_closure.c.descendant_id.in_(subtree),
+                department_closure.c.ancestor_id.in_(ancestors)))
+    await session.execute(delete(Department).where(
+        Department.id == removed_ids).execution_options(
+        synchronize_session=False))
+
+    await record_changes(session, 'department', 'delete',
+                         [(removed_id, None) for removed_id in removed])
+    await record_changes(session, 'department', 'update',
+                         [(child_id, {'parent_id': target_id})
+                          for child_id in children])
+    await record_changes(session, 'employee', 'update',
+                         [(employee_id, {'department_id': target_id})
+                          for employee_id in moved])
+    await _commit(session, commit)
+    await _invalidate(session, commit, 'department', *removed, *children)
+    await _invalidate(session, commit, 'employee', *moved)
+
+
+async def reparent_department_crud(department_id: int, parent_id: int | None,
+                                   session: AsyncSession,
+                                   commit: bool = True) -> Department:
+    await lock_hierarchy(session)
+    department = await get_department_by_id(department_id, session)
+    if parent_id is not None:
+        await get_department_by_id(parent_id, session)
+        if await is_department_descendant(department_id, parent_id, session):
+            raise HTTPException(status_code=400,
+                                detail="Department can not be moved "
+                                       "into its own subtree")
+
+    # Guarded by the version read above: a concurrent write to the row
+    # makes the UPDATE match nothing instead of raising StaleDataError
+    department = await session.scalar(update(Department).where(
+        Department.id == department_id,
+        Department.version == department.version).values(
+        parent_id=parent_id,
+        version=Department.version + 1).returning(Department))
+    if department is None:
+        raise HTTPException(status_code=409,
+                            detail="Department was changed concurrently")
+
+    subtree = select(department_closure.c.descendant_id).where(
+        department_closure.c.ancestor_id == department_id)
+    # Detach the subtree from its old ancestors, keeping internal paths
+    await session.execute(delete(department_closure).where(
+        department_closure.c.descendant_id.in_(subtree),
+        department_closure.c.ancestor_id.not_in(subtree)))
+    if parent_id is not None:
+        await session.execute(_insert_subtree_paths(department_id, parent_id))
+    await record_change(session, 'department', 'update', department_id,
+                        {'name': department.name, 'parent_id': parent_id})
+    await _commit(session, commit)
+    await _invalidate(session, commit, 'department', department_id)
+    return department
 
 
-async def get_department_employee(department_id: int, session: AsyncSession) -> \
-        list[Employee]:
-    query = select(Employee).where(Employee.department_id == department_id)
-    employees = await session.execute(query)
-    result = employees.all()
+async def reassign_employees_crud(department_id: int,
+                                 data: EmployeeReassignSchema,
+                                 session: AsyncSession,
+                                 commit: bool = True) -> list[int]:
+    """Move the department's employees, optionally filtered, in one UPDATE."""
+    await get_department_by_id(department_id, session)
+    query = update(Employee).where(
+        Employee.department_id == department_id).values(
+        department_id=data.target_department_id,
+        version=Employee.version + 1).returning(
+        Employee.id).execution_options(synchronize_session=False)
+    if data.employee_ids is not None:
+        query = query.where(Employee.id.in_(data.employee_ids))
+    if data.position_id is not None:
+        query = query.where(exists().where(
+            employee_position.c.employee_id == Employee.id,
+            employee_position.c.position_id == data.position_id))
+    try:
+        moved = (await session.scalars(query)).all()
+        await record_changes(session, 'employee', 'update',
+                             [(employee_id, {'department_id':
+                                             data.target_department_id})
+                              for employee_id in moved])
+        await _commit(session, commit)
+    except IntegrityError:
+        raise HTTPException(status_code=404,
+                            detail="Target department not found")
+    await _invalidate(session, commit, 'employee', *moved)
+    return moved
+
+
+def _insert_closure_paths(department_id: int, parent_id: int | None):
+    self_path = select(literal(department_id), literal(department_id),
+                       literal(0))
+    parent_paths = select(department_closure.c.ancestor_id,
+                          literal(department_id),
+                          department_closure.c.depth + 1).where(
+        department_closure.c.descendant_id == parent_id)
+    return insert(department_closure).from_select(
+        ['ancestor_id', 'descendant_id', 'depth'],
+        self_path.union_all(parent_paths))
+
+
+def _insert_subtree_paths(department_id: int, parent_id: int):
+    supertree = department_closure.alias('supertree')
+    subtree = department_closure.alias('subtree')
+    paths = select(supertree.c.ancestor_id, subtree.c.descendant_id,
+                   supertree.c.depth + subtree.c.depth + 1).select_from(
+        supertree.join(subtree, true())).where(
+        supertree.c.descendant_id == parent_id,
+        subtree.c.ancestor_id == department_id)
+    return insert(department_closure).from_select(
+        ['ancestor_id', 'descendant_id', 'depth'], paths)
+
+
+async def get_department_ancestors(department_id: int,
+                                   session: AsyncSession) -> list[Department]:
+    query = select(Department).join(
+        department_closure,
+        department_closure.c.ancestor_id == Department.id).where(
+        department_closure.c.descendant_id == department_id).order_by(
+        department_closure.c.depth.desc())
+    ancestors = await session.execute(query)
+    result = ancestors.scalars().all()
     if len(result) == 0:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    result = [employee[0] for employee in result]
+        raise HTTPException(status_code=404, detail="Department not found")
     return result
 
 
+async def is_department_descendant(department_id: int, descendant_id: int,
+                                   session: AsyncSession) -> bool:
+    query = select(exists().where(
+        department_closure.c.ancestor_id == department_id,
+        department_closure.c.descendant_id == descendant_id))
+    result = await session.execute(query)
+    return result.scalar()
+
+
+async def list_departments_crud(page: PageSchema, session: AsyncSession,
+                                parent_id: int | None = None,
+                                expand: list[str] = ()) -> \
+        tuple[list, int | None]:
+    query = _list_query(Department, expand)
+    if parent_id is not None:
+        query = query.where(Department.parent_id == parent_id)
+    departments = await session.execute(
+        _paginate(query, Department.id, page))
+    return _split_page(_fetch(departments, expand), page)
+
+
+async def get_department_employee(department_id: int, page: PageSchema,
+                                  session: AsyncSession,
+                                  expand: list[str] = ()) -> \
+        tuple[list, int | None]:
+    query = _list_query(Employee, expand).where(
+        Employee.department_id == department_id)
+    employees = await session.execute(_paginate(query, Employee.id, page))
+    result = _fetch(employees, expand)
+    if len(result) == 0 and page.after is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return _split_page(result, page)
+
+
+async def get_department_tree(department_id: int, session: AsyncSession,
+                              depth: int | None = None,
+                              include_employees: bool = False) -> dict:
+    tree = select(Department.id, Department.name, Department.parent_id,
+                  literal(0).label('level')).where(
+        Department.id == department_id).cte('tree', recursive=True)
+    children = select(Department.id, Department.name, Department.parent_id,
+                      (tree.c.level + 1).label('level')).join(
+        tree, Department.parent_id == tree.c.id)
+    if depth is not None:
+        children = children.where(tree.c.level < depth)
+    tree = tree.union_all(children)
+
+    if include_employees:
+        query = select(tree, Employee.id.label('employee_id'),
+                       Employee.name.label('employee_name')).outerjoin(
+            Employee, Employee.department_id == tree.c.id)
+    else:
+        query = select(tree)
+    query = query.order_by(tree.c.level, tree.c.id)
+    rows = (await session.execute(query)).all()
+    if len(rows) == 0:
+        raise HTTPException(status_code=404, detail="Department not found")
+
+    nodes = {}
+    for row in rows:
+        node = nodes.get(row.id)
+        if node is None:
+            node = {"id": row.id, "name": row.name, "sub_departments": []}
+            if include_employees:
+                node["employees"] = []
+            nodes[row.id] = node
+            if row.id != department_id:
+                nodes[row.parent_id]["sub_departments"].append(node)
+        if include_employees and row.employee_id is not None:
+            node["employees"].append({"id": row.employee_id,
+                                      "name": row.employee_name,
+                                      "department_id": row.id})
+    return nodes[department_id]
+
+
 async def add_department_position(data: DepartmentPositionSchema,
-                                  session: AsyncSession):
-    query_departament = select(Department).options(
-        joinedload(Department.positions)).where(
-        Department.id == data.department_id)
-    query_position = select(Position).where(Position.id == data.position_id)
-    _department = await session.execute(query_departament)
-    _position = await session.execute(query_position)
-    department = _department.unique().scalar_one_or_none()
-    position = _position.scalar_one_or_none()
-    if position is None or department is None:
+                                  session: AsyncSession, commit: bool = True):
+    query = pg_insert(departament_position).values(
+        departament_id=data.department_id,
+        position_id=data.position_id).on_conflict_do_nothing().returning(
+        departament_position.c.position_id)
+    try:
+        result = await session.execute(query)
+        added = result.scalar_one_or_none()
+        if added is not None:
+            await record_change(session, 'department_position', 'link',
+                                data=data.model_dump())
+        await _commit(session, commit)
+    except IntegrityError:
         raise HTTPException(status_code=404,
                             detail="Position or department not found")
-    department.positions.append(position)
-    await session.commit()
-    await session.refresh(department)
+    if added is None:
+        raise HTTPException(status_code=400,
+                            detail="Position already added to department")
+    await _invalidate(session, commit, 'department', data.department_id)
+    await _invalidate(session, commit, 'position', data.position_id)
 
 
-async def delete_department_position(data: DepartmentPositionSchema, session: AsyncSession):
+async def delete_department_position(data: DepartmentPositionSchema, session: AsyncSession,
+                                     commit: bool = True):
     query = departament_position.delete().where(departament_position.c.departament_id == data.department_id,
                                                 departament_position.c.position_id == data.position_id)
     result = await session.execute(query)
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Position not found")
-    await session.commit()
+    await record_change(session, 'department_position', 'unlink',
+                        data=data.model_dump())
+    await _commit(session, commit)
+    await _invalidate(session, commit, 'department', data.department_id)
+    await _invalidate(session, commit, 'position', data.position_id)
 
 
 # Position CRUD
 
-async def get_position(position_id: int, session: AsyncSession) -> Position:
-    query = select(Position).where(Position.id == position_id)
+async def list_positions_crud(page: PageSchema, session: AsyncSession,
+                              department_id: int | None = None,
+                              employee_id: int | None = None,
+                              expand: list[str] = ()) -> \
+        tuple[list, int | None]:
+    query = _list_query(Position, expand)
+    if department_id is not None:
+        query = query.join(
+            departament_position,
+            departament_position.c.position_id == Position.id).where(
+            departament_position.c.departament_id == department_id)
+    if employee_id is not None:
+        query = query.join(
+            employee_position,
+            employee_position.c.position_id == Position.id).where(
+            employee_position.c.employee_id == employee_id)
+    positions = await session.execute(
+        _paginate(query.distinct(), Position.id, page))
+    return _split_page(_fetch(positions, expand), page)
+
+
+async def get_position(position_id: int, session: AsyncSession,
+                       expand: list[str] = ()) -> Position:
+    query = select(Position).options(*_expand(Position, expand)).where(
+        Position.id == position_id)
     position = await session.execute(query)
     result = position.scalar_one_or_none()
     if result is None:
@@ -95,63 +463,87 @@ async def get_position(position_id: int, session: AsyncSession) -> Position:
     return result
 
 
+get_position_cached = cached('position', PositionOutSchema)(get_position)
+
+
 async def create_position_crud(data: PositionInSchema,
-                               session: AsyncSession) -> Position:
-    position = Position(title=data.title, rights=data.rights)
-    session.add(position)
+                               session: AsyncSession,
+                               commit: bool = True) -> Position:
+    query = insert(Position).values(title=data.title,
+                                    rights=data.rights).returning(Position)
     try:
-        await session.commit()
+        position = await session.scalar(query)
+        await record_change(session, 'position', 'create', position.id,
+                            {'title': position.title,
+                             'rights': position.rights})
+        await _commit(session, commit)
     except IntegrityError:
         raise HTTPException(status_code=400, detail="Position already exists")
-
-    await session.refresh(position)
+    await _invalidate(session, commit, 'position', position.id)
     return position
 
 
-async def delete_position_crud(position_id: int, session: AsyncSession):
-    query = select(Position).where(Position.id == position_id)
-    position = await session.execute(query)
-    result = position.scalar_one_or_none()
-    if result is None:
+async def delete_position_crud(position_id: int, session: AsyncSession,
+                               commit: bool = True):
+    await session.execute(delete(employee_position).where(
+        employee_position.c.position_id == position_id))
+    await session.execute(delete(departament_position).where(
+        departament_position.c.position_id == position_id))
+    query = delete(Position).where(Position.id == position_id).returning(
+        Position.id).execution_options(synchronize_session=False)
+    result = await session.execute(query)
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Position not found")
-    await session.delete(result)
-    await session.commit()
+    await record_change(session, 'position', 'delete', position_id)
+    await _commit(session, commit)
+    await _invalidate(session, commit, 'position', position_id)
 
 
 async def update_position_crud(position_id: int, data: PositionInSchema,
-                               session: AsyncSession) -> Position:
-    query = select(Position).where(Position.id == position_id)
-    position = await session.execute(query)
-    result = position.scalar_one_or_none()
-    if result is None:
-        raise HTTPException(status_code=404, detail="Position not found")
-    result.title = data.title
-    result.rights = data.rights
-    await session.commit()
-    await session.refresh(result)
+                               session: AsyncSession,
+                               commit: bool = True) -> Position:
+    query = update(Position).where(Position.id == position_id).values(
+        title=data.title, rights=data.rights,
+        version=Position.version + 1).returning(Position)
+    try:
+        result = await session.scalar(query)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Position not found")
+        await record_change(session, 'position', 'update', position_id,
+                            {'title': result.title, 'rights': result.rights})
+        await _commit(session, commit)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Position already exists")
+    await _invalidate(session, commit, 'position', position_id)
     return result
 
 
 async def add_employee_crud(data: PositionEmployeeSchema,
-                            session: AsyncSession):
-    query_position = select(Position).options(
-        joinedload(Position.employees)).where(Position.id == data.position_id)
-    query_employee = select(Employee).where(
-        Employee.id == data.employee_id)
-    _employee = await session.execute(query_employee)
-    _position = await session.execute(query_position)
-    employee = _employee.scalar_one_or_none()
-    position = _position.unique().scalar_one_or_none()
-    if position is None or employee is None:
+                            session: AsyncSession, commit: bool = True):
+    query = pg_insert(employee_position).values(
+        employee_id=data.employee_id,
+        position_id=data.position_id).on_conflict_do_nothing().returning(
+        employee_position.c.employee_id)
+    try:
+        result = await session.execute(query)
+        added = result.scalar_one_or_none()
+        if added is not None:
+            await record_change(session, 'employee_position', 'link',
+                                data=data.model_dump())
+        await _commit(session, commit)
+    except IntegrityError:
         raise HTTPException(status_code=404,
                             detail="Position or employee not found")
-    position.employees.append(employee)
-    await session.commit()
-    await session.refresh(position)
+    if added is None:
+        raise HTTPException(status_code=400,
+                            detail="Employee already has this position")
+    await _invalidate(session, commit, 'position', data.position_id)
+    await _invalidate(session, commit, 'employee', data.employee_id)
 
 
 async def delete_position_employee(data: PositionEmployeeSchema,
-                                   session: AsyncSession):
+                                   session: AsyncSession,
+                                   commit: bool = True):
     query = employee_position.delete().where(
         (employee_position.c.employee_id == data.employee_id) &
         (employee_position.c.position_id == data.position_id)
@@ -160,14 +552,36 @@ async def delete_position_employee(data: PositionEmployeeSchema,
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Position not found")
 
-    await session.commit()
+    await record_change(session, 'employee_position', 'unlink',
+                        data=data.model_dump())
+    await _commit(session, commit)
+    await _invalidate(session, commit, 'position', data.position_id)
+    await _invalidate(session, commit, 'employee', data.employee_id)
 
 
 # Employee CRUD
 
-async def get_employee_crud(employee_id: int,
-                            session: AsyncSession) -> Employee:
-    query = select(Employee).where(Employee.id == employee_id)
+async def list_employees_crud(page: PageSchema, session: AsyncSession,
+                              department_id: int | None = None,
+                              position_id: int | None = None,
+                              expand: list[str] = ()) -> \
+        tuple[list, int | None]:
+    query = _list_query(Employee, expand)
+    if department_id is not None:
+        query = query.where(Employee.department_id == department_id)
+    if position_id is not None:
+        query = query.join(
+            employee_position,
+            employee_position.c.employee_id == Employee.id).where(
+            employee_position.c.position_id == position_id).distinct()
+    employees = await session.execute(_paginate(query, Employee.id, page))
+    return _split_page(_fetch(employees, expand), page)
+
+
+async def get_employee_crud(employee_id: int, session: AsyncSession,
+                            expand: list[str] = ()) -> Employee:
+    query = select(Employee).options(*_expand(Employee, expand)).where(
+        Employee.id == employee_id)
     employee = await session.execute(query)
     result = employee.scalar_one_or_none()
     if result is None:
@@ -175,42 +589,104 @@ async def get_employee_crud(employee_id: int,
     return result
 
 
+get_employee_cached = cached('employee', EmployeeOutSchema)(get_employee_crud)
+
+
+async def get_employee_rights(employee_id: int, session: AsyncSession,
+                              inherit: bool = False) -> list[str]:
+    masks = await get_rights_masks((employee_id,), inherit, session)
+    if employee_id not in masks:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return registry.names(masks[employee_id])
+
+
 async def create_employee_crud(data: EmployeeInSchema,
-                               session: AsyncSession) -> Employee:
-    employee = Employee(name=data.name, department_id=data.department_id)
-    session.add(employee)
+                               session: AsyncSession,
+                               commit: bool = True) -> Employee:
+    query = insert(Employee).values(
+        name=data.name, department_id=data.department_id).returning(Employee)
     try:
-        await session.commit()
+        employee = await session.scalar(query)
+        await record_change(session, 'employee', 'create', employee.id,
+                            {'name': employee.name,
+                             'department_id': employee.department_id})
+        await _commit(session, commit)
     except IntegrityError:
         raise HTTPException(status_code=400,
                             detail="Employee already exists or department not exists")
-    await session.refresh(employee)
+    await _invalidate(session, commit, 'employee', employee.id)
     return employee
 
 
 async def update_employee_crud(employee_id: int, data: EmployeeInSchema,
-                               session: AsyncSession) -> Employee:
-    query = select(Employee).where(Employee.id == employee_id)
-    employee = await session.execute(query)
-    result = employee.scalar_one_or_none()
-    if result is None:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    result.name = data.name
-    result.department_id = data.department_id
+                               session: AsyncSession,
+                               commit: bool = True) -> Employee:
+    query = update(Employee).where(Employee.id == employee_id).values(
+        name=data.name, department_id=data.department_id,
+        version=Employee.version + 1).returning(Employee)
     try:
-        await session.commit()
+        result = await session.scalar(query)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        await record_change(session, 'employee', 'update', employee_id,
+                            {'name': result.name,
+                             'department_id': result.department_id})
+        await _commit(session, commit)
     except IntegrityError:
         raise HTTPException(status_code=400,
                             detail="Employee name or department id error")
-    await session.refresh(result)
+    await _invalidate(session, commit, 'employee', employee_id)
     return result
 
 
-async def delete_employee_crud(employee_id: int, session: AsyncSession):
-    query = select(Employee).where(Employee.id == employee_id)
-    employee = await session.execute(query)
-    result = employee.scalar_one_or_none()
-    if result is None:
+async def delete_employee_crud(employee_id: int, session: AsyncSession,
+                               commit: bool = True):
+    await session.execute(delete(employee_position).where(
+        employee_position.c.employee_id == employee_id))
+    query = delete(Employee).where(Employee.id == employee_id).returning(
+        Employee.id).execution_options(synchronize_session=False)
+    result = await session.execute(query)
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Employee not found")
-    await session.delete(result)
-    await session.commit()
+    await record_change(session, 'employee', 'delete', employee_id)
+    await _commit(session, commit)
+    await _invalidate(session, commit, 'employee', employee_id)
+
+
+# Search
+
+SEARCH_COLUMNS = {
+    'employee': (Employee.id, Employee.name),
+    'department': (Department.id, Department.name),
+    'position': (Position.id, Position.title),
+}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace(
+        '_', '\\_')
+
+
+async def search_crud(q: str, types: list[str], limit: int, offset: int,
+                      session: AsyncSession) -> list:
+    """Rank names by word similarity, boosting prefix matches.
+
+    Both the substring ILIKE and the `<%` word-similarity operator are
+    served by the pg_trgm GIN indexes.
+    """
+    escaped = _escape_like(q)
+    parts = []
+    for search_type in types:
+        id_column, column = SEARCH_COLUMNS[search_type]
+        score = func.word_similarity(q, column) + case(
+            (column.ilike(f'{escaped}%', escape='\\'), 1.0), else_=0.0)
+        parts.append(select(
+            literal(search_type).label('type'), id_column.label('id'),
+            column.label('name'), score.label('score')).where(or_(
+                column.ilike(f'%{escaped}%', escape='\\'),
+                literal(q).op('<%')(column))))
+    query = union_all(*parts).order_by(
+        literal_column('score').desc(), literal_column('type'),
+        literal_column('id')).limit(limit).offset(offset)
+    result = await session.execute(query)
+    return result.all()
@@ -0,0 +1,54 @@
+import csv
+import io
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import Department, Position, Employee
+from database.base import async_session_maker
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_QUERIES = {
+    'employees': select(Employee.id, Employee.name,
+                        Employee.department_id).order_by(Employee.id),
+    'positions': select(Position.id, Position.title,
+                        Position.rights).order_by(Position.id),
+    'departments': select(Department.id, Department.name,
+                          Department.parent_id).order_by(Department.id),
+}
+
+
+def _encode_ndjson(columns: list[str], rows) -> bytes:
+    return b''.join(orjson.dumps(dict(zip(columns, row))) + b'\n'
+                    for row in rows)
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue()
+
+
+async def export_rows(entity: str, fmt: str,
+                      session_maker: async_sessionmaker = async_session_maker
+                      ) -> AsyncIterator[str | bytes]:
+    """Stream a whole table through a server-side cursor.
+
+    The generator opens its own session because the response body is sent
+    after request dependencies have been cleaned up.
+    """
+    query = EXPORT_QUERIES[entity].execution_options(
+        yield_per=EXPORT_BATCH_SIZE)
+    async with session_maker() as session:
+        result = await session.stream(query)
+        columns = list(result.keys())
+        if fmt == 'csv':
+            yield _encode_csv([columns])
+        async for rows in result.partitions():
+            if fmt == 'csv':
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(columns, rows)
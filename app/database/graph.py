@@ -0,0 +1,319 @@
+import logging
+import sys
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import ORG_GRAPH_REFRESH_INTERVAL
+from database import Department, Position, Employee, employee_position, \
+    departament_position
+from database.base import async_session_maker
+from database.changes import change_feed
+from database.refresh import BackgroundRefresher
+
+logger = logging.getLogger(__name__)
+
+
+class DepartmentNode:
+    __slots__ = ('id', 'name', 'parent_id', 'children', 'employee_ids',
+                 'position_ids')
+
+    def __init__(self, id: int, name: str, parent_id: Optional[int]):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.children: tuple[int, ...] = ()
+        self.employee_ids: tuple[int, ...] = ()
+        self.position_ids: tuple[int, ...] = ()
+
+
+class EmployeeNode:
+    __slots__ = ('id', 'name', 'department_id', 'position_ids')
+
+    def __init__(self, id: int, name: str, department_id: Optional[int]):
+        self.id = id
+        self.name = name
+        self.department_id = department_id
+        self.position_ids: tuple[int, ...] = ()
+
+
+class PositionNode:
+    __slots__ = ('id', 'title', 'rights')
+
+    def __init__(self, id: int, title: str, rights: Optional[str]):
+        self.id = id
+        self.title = title
+        self.rights = rights
+
+
+def _group(pairs) -> dict[int, tuple[int, ...]]:
+    grouped: dict[int, list[int]] = {}
+    for key, value in pairs:
+        grouped.setdefault(key, []).append(value)
+    return {key: tuple(values) for key, values in grouped.items()}
+
+
+def _with(ids: tuple[int, ...], object_id: int) -> tuple[int, ...]:
+    return ids if object_id in ids else ids + (object_id,)
+
+
+def _without(ids: tuple[int, ...], object_id: int) -> tuple[int, ...]:
+    return tuple(value for value in ids if value != object_id)
+
+
+class OrgGraph:
+    """Snapshot of the organization with adjacency indexes.
+
+    Changes are applied in place by `apply`, which never awaits, so a
+    request handler always sees the graph between two whole changes.
+    """
+
+    def __init__(self, departments: dict[int, DepartmentNode],
+                 employees: dict[int, EmployeeNode],
+                 positions: dict[int, PositionNode]):
+        self.departments = departments
+        self.employees = employees
+        self.positions = positions
+        self.loaded_at = time.time()
+
+    @classmethod
+    async def load(cls, session: AsyncSession) -> 'OrgGraph':
+        departments = {row.id: DepartmentNode(*row) for row in
+                       await session.execute(select(
+                           Department.id, Department.name,
+                           Department.parent_id))}
+        employees = {row.id: EmployeeNode(*row) for row in
+                     await session.execute(select(
+                         Employee.id, Employee.name, Employee.department_id))}
+        positions = {row.id: PositionNode(*row) for row in
+                     await session.execute(select(
+                         Position.id, Position.title, Position.rights))}
+        employee_links = _group(await session.execute(select(
+            employee_position.c.employee_id,
+            employee_position.c.position_id)))
+        department_links = _group(await session.execute(select(
+            departament_position.c.departament_id,
+            departament_position.c.position_id)))
+
+        children = _group((node.parent_id, node.id)
+                          for node in departments.values()
+                          if node.parent_id is not None)
+        members = _group((node.department_id, node.id)
+                         for node in employees.values()
+                         if node.department_id is not None)
+        for department_id, node in departments.items():
+            node.children = children.get(department_id, ())
+            node.employee_ids = members.get(department_id, ())
+            node.position_ids = department_links.get(department_id, ())
+        for employee_id, node in employees.items():
+            node.position_ids = employee_links.get(employee_id, ())
+        return cls(departments, employees, positions)
+
+    def apply(self, event: dict):
+        """Apply one change-log event; applying it again is harmless.
+
+        Raises KeyError when the event alone does not carry enough to
+        apply it, e.g. a partial update of an unknown department.
+        """
+        entity, op, object_id = event['entity'], event['op'], event['id']
+        data = event['data'] or {}
+        if entity == 'department':
+            if op == 'delete':
+                self._remove_department(object_id)
+            else:
+                self._put_department(object_id, data)
+        elif entity == 'employee':
+            if op == 'delete':
+                self._remove_employee(object_id)
+            else:
+                self._put_employee(object_id, data)
+        elif entity == 'position':
+            if op == 'delete':
+                self._remove_position(object_id)
+            else:
+                node = self.positions.get(object_id)
+                if node is None:
+                    self.positions[object_id] = PositionNode(
+                        object_id, data['title'], data['rights'])
+                else:
+                    node.title = data.get('title', node.title)
+                    node.rights = data.get('rights', node.rights)
+        elif entity == 'employee_position':
+            node = self.employees.get(data['employee_id'])
+            if node is not None:
+                link = _with if op == 'link' else _without
+                node.position_ids = link(node.position_ids,
+                                         data['position_id'])
+        elif entity == 'department_position':
+            node = self.departments.get(data['department_id'])
+            if node is not None:
+                link = _with if op == 'link' else _without
+                node.position_ids = link(node.position_ids,
+                                         data['position_id'])
+
+    def _put_department(self, department_id: int, data: dict):
+        node = self.departments.get(department_id)
+        if node is None:
+            node = self.departments[department_id] = DepartmentNode(
+                department_id, data['name'], None)
+        else:
+            node.name = data.get('name', node.name)
+        if 'parent_id' not in data or data['parent_id'] == node.parent_id:
+            return
+        old_parent = self.departments.get(node.parent_id)
+        if old_parent is not None:
+            old_parent.children = _without(old_parent.children,
+                                           department_id)
+        node.parent_id = data['parent_id']
+        new_parent = self.departments.get(node.parent_id)
+        if new_parent is not None:
+            new_parent.children = _with(new_parent.children, department_id)
+
+    def _remove_department(self, department_id: int):
+        # Children and employees arrive as updates of their own
+        node = self.departments.pop(department_id, None)
+        if node is None:
+            return
+        parent = self.departments.get(node.parent_id)
+        if parent is not None:
+            parent.children = _without(parent.children, department_id)
+
+    def _put_employee(self, employee_id: int, data: dict):
+        node = self.employees.get(employee_id)
+        if node is None:
+            node = self.employees[employee_id] = EmployeeNode(
+                employee_id, data['name'], None)
+        else:
+            node.name = data.get('name', node.name)
+        if 'department_id' not in data or \
+                data['department_id'] == node.department_id:
+            return
+        old_department = self.departments.get(node.department_id)
+        if old_department is not None:
+            old_department.employee_ids = _without(
+                old_department.employee_ids, employee_id)
+        node.department_id = data['department_id']
+        new_department = self.departments.get(node.department_id)
+        if new_department is not None:
+            new_department.employee_ids = _with(new_department.employee_ids,
+                                                employee_id)
+
+    def _remove_employee(self, employee_id: int):
+        node = self.employees.pop(employee_id, None)
+        if node is None:
+            return
+        department = self.departments.get(node.department_id)
+        if department is not None:
+            department.employee_ids = _without(department.employee_ids,
+                                               employee_id)
+
+    def _remove_position(self, position_id: int):
+        # Deleting a position also deletes its links
+        if self.positions.pop(position_id, None) is None:
+            return
+        for nodes in (self.employees, self.departments):
+            for node in nodes.values():
+                if position_id in node.position_ids:
+                    node.position_ids = _without(node.position_ids,
+                                                 position_id)
+
+    def department(self, department_id: int) -> Optional[DepartmentNode]:
+        return self.departments.get(department_id)
+
+    def subtree(self, department_id: int) -> list[DepartmentNode]:
+        stack = [self.departments[department_id]]
+        result = []
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(self.departments[child] for child in node.children)
+        return result
+
+    def employees_under(self, department_id: int) -> list[EmployeeNode]:
+        return [self.employees[employee_id]
+                for node in self.subtree(department_id)
+                for employee_id in node.employee_ids]
+
+    def positions_in_subtree(self, department_id: int) -> list[PositionNode]:
+        position_ids = {position_id
+                        for node in self.subtree(department_id)
+                        for position_id in node.position_ids}
+        return [self.positions[position_id]
+                for position_id in sorted(position_ids)]
+
+    def chain_of_command(self, department_id: int) -> list[DepartmentNode]:
+        """Departments from the root down to `department_id`."""
+        chain = []
+        node = self.departments.get(department_id)
+        while node is not None:
+            chain.append(node)
+            node = self.departments.get(node.parent_id)
+        chain.reverse()
+        return chain
+
+    def footprint(self) -> int:
+        """Approximate size in bytes of the nodes and their indexes."""
+        size = 0
+        for nodes in (self.departments, self.employees, self.positions):
+            size += sys.getsizeof(nodes)
+            for node in nodes.values():
+                size += sys.getsizeof(node)
+                for slot in node.__slots__:
+                    size += sys.getsizeof(getattr(node, slot))
+        return size
+
+
+class OrgGraphService(BackgroundRefresher):
+    """Keeps a fresh `OrgGraph` for the current worker.
+
+    Committed changes from every worker are applied as they arrive on the
+    change feed. The graph is only loaded in full on start and when
+    changes may have been missed: after the feed reconnects, after a bulk
+    import, or when a change cannot be applied on its own. A periodic
+    reload only runs when ORG_GRAPH_REFRESH_INTERVAL is set.
+    """
+
+    name = 'Org graph'
+
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self.graph: Optional[OrgGraph] = None
+        # Changes that arrive while a full load runs, replayed onto it
+        self._pending: Optional[list[dict]] = None
+
+    async def reload(self):
+        self._pending = []
+        try:
+            async with async_session_maker() as session:
+                graph = await OrgGraph.load(session)
+            for event in self._pending:
+                self._apply(graph, event)
+            self.graph = graph
+        finally:
+            self._pending = None
+
+    def on_change(self, event: Optional[dict]):
+        if not self.enabled and self._pending is None:
+            return
+        if event is None or (event['id'] is None and event['entity'] in
+                             ('department', 'employee', 'position')):
+            self.mark_dirty('graph', None)
+            return
+        if self._pending is not None:
+            self._pending.append(event)
+        if self.graph is not None:
+            self._apply(self.graph, event)
+
+    def _apply(self, graph: OrgGraph, event: dict):
+        try:
+            graph.apply(event)
+        except KeyError:
+            logger.warning("Reloading the org graph, change %s could not "
+                           "be applied", event['seq'])
+            self.mark_dirty('graph', None)
+
+
+org_graph = OrgGraphService(ORG_GRAPH_REFRESH_INTERVAL)
+change_feed.listeners.append(org_graph.on_change)
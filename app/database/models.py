@@ -1,28 +1,49 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index, \
+    BigInteger, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from .base import Base
 
 employee_position = Table('employee_position', Base.metadata,
                           Column('employee_id', Integer,
-                                 ForeignKey('employees.id')),
+                                 ForeignKey('employees.id'),
+                                 primary_key=True),
                           Column('position_id', Integer,
-                                 ForeignKey('positions.id'))
+                                 ForeignKey('positions.id'),
+                                 primary_key=True, index=True)
                           )
 
 departament_position = Table('departament_position', Base.metadata,
                              Column('departament_id', Integer,
-                                    ForeignKey('departments.id')),
+                                    ForeignKey('departments.id'),
+                                    primary_key=True),
                              Column('position_id', Integer,
-                                    ForeignKey('positions.id'))
+                                    ForeignKey('positions.id'),
+                                    primary_key=True, index=True)
                              )
 
+department_closure = Table('department_closure', Base.metadata,
+                           Column('ancestor_id', Integer,
+                                  ForeignKey('departments.id'),
+                                  primary_key=True),
+                           Column('descendant_id', Integer,
+                                  ForeignKey('departments.id'),
+                                  primary_key=True, index=True),
+                           Column('depth', Integer, nullable=False)
+                           )
+
 
 class Department(Base):
     __tablename__ = 'departments'
+    __table_args__ = (
+        Index('ix_departments_name_trgm', 'name', postgresql_using='gin',
+              postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, unique=True)
-    parent_id = Column(Integer, ForeignKey('departments.id'))
+    parent_id = Column(Integer, ForeignKey('departments.id'), index=True)
+    version = Column(Integer, nullable=False, server_default='1')
 
     sub_departments = relationship('Department', backref='parent',
                                    remote_side=[id])
@@ -31,27 +52,55 @@ class Department(Base):
     positions = relationship('Position', secondary=departament_position,
                              back_populates='departments')
 
+    __mapper_args__ = {'version_id_col': version}
+
 
 class Position(Base):
     __tablename__ = 'positions'
+    __table_args__ = (
+        Index('ix_positions_title_trgm', 'title', postgresql_using='gin',
+              postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False, unique=True)
     rights = Column(String)
+    version = Column(Integer, nullable=False, server_default='1')
 
     employees = relationship('Employee', secondary=employee_position,
                              back_populates='positions')
 
     departments = relationship('Department', secondary=departament_position, back_populates='positions')
 
+    __mapper_args__ = {'version_id_col': version}
+
 
 class Employee(Base):
     __tablename__ = 'employees'
+    __table_args__ = (
+        Index('ix_employees_name_trgm', 'name', postgresql_using='gin',
+              postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, unique=True)
-    department_id = Column(Integer, ForeignKey('departments.id'))
+    department_id = Column(Integer, ForeignKey('departments.id'), index=True)
+    version = Column(Integer, nullable=False, server_default='1')
 
     positions = relationship('Position', secondary=employee_position,
                              back_populates='employees')
     department = relationship('Department', back_populates='employees')
+
+    __mapper_args__ = {'version_id_col': version}
+
+
+class ChangeLog(Base):
+    __tablename__ = 'change_log'
+
+    id = Column(BigInteger, primary_key=True)
+    entity = Column(String, nullable=False)
+    op = Column(String, nullable=False)
+    object_id = Column(Integer)
+    data = Column(JSONB(none_as_null=True))
+    created_at = Column(DateTime(timezone=True), nullable=False,
+                        server_default=func.now())
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Writes arriving within this window are folded into a single reload
+RELOAD_DEBOUNCE = 0.5
+
+
+class BackgroundRefresher:
+    """Runs `reload` in the background of the current worker.
+
+    Writes seen by this worker schedule a reload; a periodic reload, unless
+    the interval is 0, picks up changes made through other workers.
+    """
+
+    name = 'Background data'
+    # Whether start() fails along with the first reload; otherwise the
+    # error is logged and the periodic reload tries again
+    reload_required = True
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None
+
+    async def reload(self):
+        raise NotImplementedError
+
+    async def start(self):
+        try:
+            await self.reload()
+        except Exception:
+            if self.reload_required:
+                raise
+            logger.exception("%s initial reload failed", self.name)
+        self._task = asyncio.create_task(self._refresh())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def mark_dirty(self, namespace: str,
+                   object_ids: Optional[tuple[int, ...]]):
+        if self._task is not None:
+            self._dirty.set()
+
+    async def _refresh(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(),
+                                       self.interval or None)
+                await asyncio.sleep(RELOAD_DEBOUNCE)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("%s reload failed", self.name)
@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import AsyncGenerator
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import DB_REPLICA_URLS, DB_REPLICA_CHECK_INTERVAL, \
+    DB_REPLICA_CHECK_TIMEOUT
+from database.base import build_engine, async_session_maker
+from database.refresh import BackgroundRefresher
+
+logger = logging.getLogger(__name__)
+
+# Set after a successful write; holds the time until which the client
+# reads from the primary
+PRIMARY_PIN_COOKIE = 'primary_until'
+# Lets clients without cookies ask for the primary explicitly
+PRIMARY_PIN_HEADER = 'X-Read-Primary'
+
+
+class Replica:
+    __slots__ = ('url', 'engine', 'session_maker', 'healthy')
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = build_engine(url)
+        self.session_maker = async_sessionmaker(
+            self.engine, expire_on_commit=False, class_=AsyncSession)
+        self.healthy = True
+
+
+class ReplicaSet(BackgroundRefresher):
+    """Round-robins reads over the replicas that pass the health check."""
+
+    name = 'Replica health check'
+
+    def __init__(self, urls: list[str], interval: float, timeout: float):
+        super().__init__(interval)
+        self.timeout = timeout
+        self.replicas = [Replica(url) for url in urls]
+        self._turn = itertools.count()
+
+    async def _check(self, replica: Replica) -> bool:
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with replica.engine.connect() as connection:
+                    await connection.execute(text('SELECT 1'))
+        except Exception as exc:
+            if replica.healthy:
+                logger.warning("Replica %s is unhealthy: %r",
+                               replica.engine.url, exc)
+            return False
+        return True
+
+    async def reload(self):
+        results = await asyncio.gather(*(self._check(replica)
+                                         for replica in self.replicas))
+        for replica, healthy in zip(self.replicas, results):
+            replica.healthy = healthy
+
+    def session_maker(self) -> async_sessionmaker:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return async_session_maker
+        return healthy[next(self._turn) % len(healthy)].session_maker
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_set = ReplicaSet(DB_REPLICA_URLS, DB_REPLICA_CHECK_INTERVAL,
+                         DB_REPLICA_CHECK_TIMEOUT)
+
+
+def pinned_to_primary(request: Request) -> bool:
+    if request.headers.get(PRIMARY_PIN_HEADER, '').lower() == 'true':
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_session_maker(request: Request) -> async_sessionmaker:
+    if pinned_to_primary(request):
+        return async_session_maker
+    return replica_set.session_maker()
+
+
+async def get_read_session(
+        request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes, served by a replica when available."""
+    async with read_session_maker(request)() as session:
+        yield session
@@ -0,0 +1,218 @@
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from sqlalchemy import select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import CACHE_MAX_SIZE, CACHE_TTL
+from database import Position, Employee, employee_position, \
+    departament_position, department_closure
+from database.cache import invalidation_listeners
+from database.changes import change_feed
+
+RIGHTS_SEPARATOR = re.compile(r'[\s,;]+')
+
+
+class RightsRegistry:
+    """Interns right names into bit positions of an int bitset.
+
+    Bits are assigned per process on first sight and never persisted.
+    """
+
+    def __init__(self):
+        self._bits: dict[str, int] = {}
+        self._names: list[str] = []
+
+    def bit(self, name: str) -> int:
+        bit = self._bits.get(name)
+        if bit is None:
+            bit = self._bits[name] = 1 << len(self._names)
+            self._names.append(name)
+        return bit
+
+    def lookup(self, name: str) -> int:
+        """Bit of an already known right, 0 for one nobody holds."""
+        return self._bits.get(name, 0)
+
+    def names(self, mask: int) -> list[str]:
+        return [name for index, name in enumerate(self._names)
+                if mask >> index & 1]
+
+
+registry = RightsRegistry()
+
+
+@lru_cache(maxsize=4096)
+def parse_rights(rights: Optional[str]) -> int:
+    mask = 0
+    for name in RIGHTS_SEPARATOR.split(rights or ''):
+        if name:
+            mask |= registry.bit(name)
+    return mask
+
+
+class RightsCache:
+    """Effective rights per `(employee_id, inherit)` with precise eviction.
+
+    Entries remember the positions they were built from, so a position
+    change only evicts the employees holding it. Writes handled by other
+    worker processes arrive through the change feed; the TTL only bounds
+    staleness if a notification is lost.
+
+    Every eviction bumps `generation`. A load that started before one may
+    have read the revoked rights, and the eviction may have missed its key
+    because it was not cached yet, so `set` drops such a load.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[int, bool],
+                                   tuple[float, int, frozenset[int]]] = \
+            OrderedDict()
+        self._by_position: dict[int, set[tuple[int, bool]]] = {}
+        self.generation = 0
+
+    def get(self, key: tuple[int, bool]) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: tuple[int, bool], mask: int,
+            position_ids: frozenset[int], generation: int):
+        if generation != self.generation:
+            return
+        self._evict(key)
+        self._entries[key] = (time.monotonic() + self.ttl, mask, position_ids)
+        for position_id in position_ids:
+            self._by_position.setdefault(position_id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: tuple[int, bool]):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for position_id in entry[2]:
+            holders = self._by_position.get(position_id)
+            if holders is not None:
+                holders.discard(key)
+                if not holders:
+                    del self._by_position[position_id]
+
+    def evict_employee(self, employee_id: int):
+        self.generation += 1
+        self._evict((employee_id, False))
+        self._evict((employee_id, True))
+
+    def evict_position(self, position_id: int):
+        self.generation += 1
+        for key in list(self._by_position.get(position_id, ())):
+            self._evict(key)
+
+    def evict_inherited(self):
+        self.generation += 1
+        for key in [key for key in self._entries if key[1]]:
+            self._evict(key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._by_position.clear()
+
+
+rights_cache = RightsCache(CACHE_MAX_SIZE, CACHE_TTL)
+
+
+def _on_invalidate(namespace: str, object_ids: Optional[tuple[int, ...]]):
+    if object_ids is None:
+        rights_cache.clear()
+    elif namespace == 'employee':
+        for employee_id in object_ids:
+            rights_cache.evict_employee(employee_id)
+    elif namespace == 'position':
+        for position_id in object_ids:
+            rights_cache.evict_position(position_id)
+    elif namespace == 'department':
+        # Department links and hierarchy only feed inherited rights
+        rights_cache.evict_inherited()
+
+
+def _on_change(event: Optional[dict]):
+    if event is None:
+        rights_cache.clear()
+        return
+    entity, object_id = event['entity'], event['id']
+    if entity == 'employee_position':
+        rights_cache.evict_employee(event['data']['employee_id'])
+    elif entity == 'department_position':
+        _on_invalidate('department', ())
+    elif entity in ('employee', 'position', 'department'):
+        # Bulk imports are logged without an object id
+        _on_invalidate(entity, None if object_id is None else (object_id,))
+
+
+invalidation_listeners.append(_on_invalidate)
+change_feed.listeners.append(_on_change)
+
+
+async def _load_rights(employee_ids: Iterable[int], inherit: bool,
+                       session: AsyncSession) -> dict[int, int]:
+    """Resolve rights of employees missing from the cache in one query."""
+    employee_ids = list(employee_ids)
+    links = select(employee_position.c.employee_id,
+                   employee_position.c.position_id).where(
+        employee_position.c.employee_id.in_(employee_ids))
+    if inherit:
+        links = union(links, select(
+            Employee.id, departament_position.c.position_id).join(
+            department_closure,
+            department_closure.c.descendant_id == Employee.department_id).join(
+            departament_position,
+            departament_position.c.departament_id ==
+            department_closure.c.ancestor_id).where(
+            Employee.id.in_(employee_ids)))
+    links = links.subquery()
+    query = select(Employee.id, Position.id, Position.rights).outerjoin(
+        links, links.c.employee_id == Employee.id).outerjoin(
+        Position, Position.id == links.c.position_id).where(
+        Employee.id.in_(employee_ids))
+    # Evictions while the query runs may be for rights it has already read
+    generation = rights_cache.generation
+    rows = await session.execute(query)
+
+    masks: dict[int, int] = {}
+    positions: dict[int, set[int]] = {}
+    for employee_id, position_id, rights in rows:
+        masks[employee_id] = masks.get(employee_id, 0) | parse_rights(rights)
+        held = positions.setdefault(employee_id, set())
+        if position_id is not None:
+            held.add(position_id)
+    for employee_id, mask in masks.items():
+        rights_cache.set((employee_id, inherit), mask,
+                         frozenset(positions[employee_id]), generation)
+    return masks
+
+
+async def get_rights_masks(employee_ids: Iterable[int], inherit: bool,
+                           session: AsyncSession) -> dict[int, int]:
+    """Rights bitsets by employee id; unknown employees are left out."""
+    masks: dict[int, int] = {}
+    missing = []
+    for employee_id in set(employee_ids):
+        mask = rights_cache.get((employee_id, inherit))
+        if mask is None:
+            missing.append(employee_id)
+        else:
+            masks[employee_id] = mask
+    if missing:
+        masks.update(await _load_rights(missing, inherit, session))
+    return masks
@@ -0,0 +1,167 @@
+import logging
+import time
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Table, MetaData, Column, Integer, select, text, \
+    func, exists
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from config import STATS_REFRESH_ENABLED, STATS_REFRESH_INTERVAL
+from database import Department, Employee, employee_position, \
+    departament_position, department_closure
+from database.base import engine
+from database.changes import change_feed
+from database.refresh import BackgroundRefresher
+from schemas.pagination import PageSchema
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock held by the one process that refreshes the view
+STATS_REFRESH_LOCK_KEY = 0x737461
+
+# Materialized view created by a migration; kept out of Base.metadata so
+# autogenerate does not try to create it as a table
+department_stats = Table('department_stats', MetaData(),
+                         Column('department_id', Integer, primary_key=True),
+                         Column('direct_headcount', Integer),
+                         Column('total_headcount', Integer),
+                         Column('position_count', Integer),
+                         Column('filled_positions', Integer),
+                         )
+
+
+class DepartmentStatsService(BackgroundRefresher):
+    """Refreshes the `department_stats` view after writes.
+
+    Only the process holding the refresh lock refreshes, on a connection
+    kept for that purpose; the others try to take the lock over on every
+    interval, so a new leader appears when the old one exits.
+    """
+
+    name = 'Department stats'
+    reload_required = False
+
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self.refreshed_at: Optional[float] = None
+        self._connection: Optional[AsyncConnection] = None
+
+    def on_change(self, event: Optional[dict]):
+        # Followers take the lock over on the interval, not after writes
+        if self._connection is not None:
+            self.mark_dirty('department', None)
+
+    async def _lead(self) -> bool:
+        if self._connection is not None:
+            return True
+        connection = await engine.connect()
+        try:
+            leader = await connection.scalar(select(
+                func.pg_try_advisory_lock(STATS_REFRESH_LOCK_KEY)))
+            await connection.commit()
+        except Exception:
+            await connection.close()
+            raise
+        if not leader:
+            await connection.close()
+            return False
+        logger.info("Refreshing department stats in this process")
+        self._connection = connection
+        return True
+
+    async def _resign(self, broken: bool = False):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if broken:
+            # Discarding the connection ends its session and the lock
+            await connection.invalidate()
+            return
+        await connection.scalar(select(
+            func.pg_advisory_unlock(STATS_REFRESH_LOCK_KEY)))
+        await connection.commit()
+        await connection.close()
+
+    async def reload(self):
+        if not await self._lead():
+            return
+        try:
+            # CONCURRENTLY keeps the view readable while it is rebuilt
+            await self._connection.execute(text(
+                'REFRESH MATERIALIZED VIEW CONCURRENTLY department_stats'))
+            await self._connection.commit()
+        except Exception:
+            await self._resign(broken=True)
+            raise
+        self.refreshed_at = time.time()
+
+    async def stop(self):
+        await super().stop()
+        await self._resign()
+
+
+department_stats_service = DepartmentStatsService(STATS_REFRESH_INTERVAL)
+change_feed.listeners.append(department_stats_service.on_change)
+
+
+def _live_stats():
+    """The view's columns aggregated from the tables at query time.
+
+    Per-department subqueries, so a page only aggregates the departments
+    it returns.
+    """
+    direct = select(func.count(Employee.id)).where(
+        Employee.department_id == Department.id).scalar_subquery()
+    total = select(func.count(Employee.id)).join(
+        department_closure,
+        department_closure.c.descendant_id == Employee.department_id).where(
+        department_closure.c.ancestor_id == Department.id).scalar_subquery()
+    positions = select(func.count()).where(
+        departament_position.c.departament_id == Department.id)
+    filled = positions.where(exists().where(
+        employee_position.c.position_id == departament_position.c.position_id,
+        employee_position.c.employee_id == Employee.id,
+        Employee.department_id == departament_position.c.departament_id))
+    return select(Department.id.label('department_id'),
+                  direct.label('direct_headcount'),
+                  total.label('total_headcount'),
+                  positions.scalar_subquery().label('position_count'),
+                  filled.scalar_subquery().label('filled_positions')
+                  ).subquery('live_department_stats')
+
+
+def _stats_source():
+    # Without the refresh the view keeps what the migration put in it
+    return department_stats if STATS_REFRESH_ENABLED else _live_stats()
+
+
+async def get_department_stats(department_id: int, session: AsyncSession):
+    source = _stats_source()
+    query = select(source).where(source.c.department_id == department_id)
+    stats = (await session.execute(query)).first()
+    if stats is None and source is department_stats:
+        # Created since the last refresh
+        live = _live_stats()
+        stats = (await session.execute(select(live).where(
+            live.c.department_id == department_id))).first()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return stats
+
+
+async def list_department_stats(page: PageSchema, session: AsyncSession,
+                                department_ids: Optional[list[int]] = None
+                                ) -> tuple[list, int | None]:
+    source = _stats_source()
+    query = select(source)
+    if page.after is not None:
+        query = query.where(source.c.department_id > page.after)
+    if department_ids:
+        query = query.where(source.c.department_id.in_(department_ids))
+    query = query.order_by(source.c.department_id).limit(page.limit + 1)
+    rows = (await session.execute(query)).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        return rows, rows[-1].department_id
+    return rows, None
@@ -0,0 +1,72 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class RequestTimings:
+    """Database time spent on behalf of one request."""
+
+    __slots__ = ('statements', 'db_time', 'pool_wait', 'slowest_time',
+                 'slowest_statement')
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record_statement(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_time += seconds
+        if seconds > self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_statement = statement
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    'current_timings', default=None)
+
+
+def record_pool_wait(seconds: float):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.pool_wait += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _record(conn, statement: str):
+    started = conn.info.pop('query_started', None)
+    if started is None:
+        return
+    timings = current_timings.get()
+    if timings is not None:
+        timings.record_statement(statement, time.perf_counter() - started)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    _record(conn, statement)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; its time
+    # still counts
+    if exception_context.connection is not None:
+        _record(exception_context.connection, exception_context.statement)
+
+
+def install_sql_timing(engine: AsyncEngine):
+    """Attribute statement times to the request running them."""
+    event.listen(engine.sync_engine, 'before_cursor_execute',
+                 _before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute',
+                 _after_cursor_execute)
+    event.listen(engine.sync_engine, 'handle_error', _handle_error)
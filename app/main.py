@@ -1,6 +1,60 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
 from api import router
+from api.metrics import MetricsMiddleware, count_integrity_errors, \
+    metrics_writer, router as metrics_router
+from api.consistency import ReadYourWritesMiddleware
+from api.profiling import ProfilingMiddleware
+from api.responses import ORJSONResponse
+from config import ORG_GRAPH_ENABLED, STATS_REFRESH_ENABLED, \
+    PROFILING_ENABLED, PROFILING_SAMPLE_RATE, PROFILING_DIR, METRICS_DIR, \
+    READ_YOUR_WRITES_WINDOW
+from database.base import engine
+from database.changes import change_feed
+from database.graph import org_graph
+from database.replicas import replica_set
+from database.stats import department_stats_service
+from database.timing import install_sql_timing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ORG_GRAPH_ENABLED:
+        await org_graph.start()
+    if STATS_REFRESH_ENABLED:
+        await department_stats_service.start()
+    await change_feed.start()
+    if METRICS_DIR:
+        await metrics_writer.start()
+    if replica_set.replicas:
+        await replica_set.start()
+    yield
+    await replica_set.stop()
+    await replica_set.dispose()
+    await metrics_writer.stop()
+    await metrics_writer.reload()
+    await change_feed.stop()
+    await department_stats_service.stop()
+    await org_graph.stop()
+    await engine.dispose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.include_router(router)
+app.include_router(metrics_router)
+app.add_middleware(MetricsMiddleware)
+app.add_exception_handler(HTTPException, count_integrity_errors)
+
+if replica_set.replicas:
+    app.add_middleware(ReadYourWritesMiddleware,
+                       window=READ_YOUR_WRITES_WINDOW)
+
+if PROFILING_ENABLED:
+    install_sql_timing(engine)
+    for replica in replica_set.replicas:
+        install_sql_timing(replica.engine)
+    app.add_middleware(ProfilingMiddleware,
+                       sample_rate=PROFILING_SAMPLE_RATE,
+                       profile_dir=PROFILING_DIR)
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+
+MAX_CHECKS = 1000
+
+
+class EmployeeRightsSchema(BaseModel):
+    employee_id: int
+    rights: list[str]
+
+
+class AuthzCheckSchema(BaseModel):
+    employee_id: int
+    right: str
+
+
+class AuthzCheckInSchema(BaseModel):
+    checks: list[AuthzCheckSchema] = Field(max_length=MAX_CHECKS)
+    inherit: bool = False
+
+
+class AuthzResultSchema(AuthzCheckSchema):
+    allowed: bool
+
+
+class AuthzCheckOutSchema(BaseModel):
+    results: list[AuthzResultSchema]
@@ -0,0 +1,28 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+MAX_BATCH_SIZE = 1000
+
+
+class BatchOperationSchema(BaseModel):
+    op: Literal['create', 'update', 'delete', 'link', 'unlink']
+    entity: Literal['employee', 'position', 'department']
+    id: Optional[int] = None
+    data: dict = {}
+
+
+class BatchInSchema(BaseModel):
+    operations: list[BatchOperationSchema] = Field(max_length=MAX_BATCH_SIZE)
+    atomic: bool = True
+
+
+class BatchResultSchema(BaseModel):
+    status: int
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BatchOutSchema(BaseModel):
+    committed: bool
+    results: list[BatchResultSchema]
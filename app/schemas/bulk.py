@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class BulkImportResultSchema(BaseModel):
+    inserted: int
+    updated: int
+    rejected: int
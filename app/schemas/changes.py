@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ChangeSchema(BaseModel):
+    seq: int
+    entity: str
+    op: str
+    id: Optional[int] = None
+    data: Optional[dict] = None
+    created_at: datetime
@@ -1,7 +1,11 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
+from schemas.employee import EmployeeOutSchema
+
+DeleteStrategy = Literal['orphan', 'reparent-to-parent', 'cascade']
+
 
 class DepartmentOutSchema(BaseModel):
     id: int
@@ -19,3 +23,17 @@ class DepartmentInSchema(BaseModel):
 class DepartmentPositionSchema(BaseModel):
     department_id: int
     position_id: int
+
+
+class DepartmentTreeSchema(DepartmentOutSchema):
+    employees: Optional[list[EmployeeOutSchema]] = None
+    sub_departments: list["DepartmentTreeSchema"] = []
+
+
+class DepartmentMoveSchema(BaseModel):
+    parent_id: Optional[int] = None
+
+
+class ReassignResultSchema(BaseModel):
+    moved: int
+    employee_ids: list[int]
@@ -14,3 +14,9 @@ class EmployeeOutSchema(EmployeeBaseSchema):
 
 class EmployeeInSchema(EmployeeBaseSchema):
     pass
+
+
+class EmployeeReassignSchema(BaseModel):
+    target_department_id: Optional[int] = None
+    employee_ids: Optional[list[int]] = None
+    position_id: Optional[int] = None
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from schemas.department import DepartmentOutSchema
+from schemas.employee import EmployeeOutSchema
+from schemas.position import PositionOutSchema
+
+# Relationships each resource can embed with `expand=`, and the schema of
+# the embedded objects
+EMPLOYEE_RELATIONS = {
+    'positions': PositionOutSchema,
+    'department': DepartmentOutSchema,
+}
+POSITION_RELATIONS = {
+    'employees': EmployeeOutSchema,
+    'departments': DepartmentOutSchema,
+}
+DEPARTMENT_RELATIONS = {
+    'employees': EmployeeOutSchema,
+    'positions': PositionOutSchema,
+}
+
+
+class EmployeeExpandedSchema(EmployeeOutSchema):
+    positions: Optional[list[PositionOutSchema]] = None
+    department: Optional[DepartmentOutSchema] = None
+
+
+class PositionExpandedSchema(PositionOutSchema):
+    employees: Optional[list[EmployeeOutSchema]] = None
+    departments: Optional[list[DepartmentOutSchema]] = None
+
+
+class DepartmentExpandedSchema(DepartmentOutSchema):
+    employees: Optional[list[EmployeeOutSchema]] = None
+    positions: Optional[list[PositionOutSchema]] = None
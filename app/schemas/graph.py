@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class OrgGraphStatusSchema(BaseModel):
+    age_seconds: float
+    footprint_bytes: int
+    departments: int
+    employees: int
+    positions: int
@@ -0,0 +1,12 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+SearchType = Literal['employee', 'department', 'position']
+
+
+class SearchResultSchema(BaseModel):
+    type: SearchType
+    id: int
+    name: str
+    score: float
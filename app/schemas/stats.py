@@ -0,0 +1,21 @@
+from typing import Optional
+
+from pydantic import BaseModel, computed_field
+
+
+class DepartmentStatsSchema(BaseModel):
+    department_id: int
+    direct_headcount: int
+    total_headcount: int
+    position_count: int
+    filled_positions: int
+
+    @computed_field
+    @property
+    def fill_rate(self) -> Optional[float]:
+        if not self.position_count:
+            return None
+        return self.filled_positions / self.position_count
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,62 @@
+"""Production launcher: migrate once, then serve with several workers.
+
+Workers are spawned by uvicorn and import the app themselves, so every
+worker builds its own engine and pool instead of inheriting sockets from
+the parent. uvloop and httptools come with uvicorn's standard extra and
+are picked up whenever they are importable.
+"""
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+
+import uvicorn
+from alembic import command
+from alembic.config import Config
+
+from config import WEB_HOST, WEB_PORT, WEB_CONCURRENCY, \
+    WEB_GRACEFUL_TIMEOUT, RUN_MIGRATIONS, METRICS_DIR
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'alembic.ini')
+
+
+def worker_count() -> int:
+    if WEB_CONCURRENCY > 0:
+        return WEB_CONCURRENCY
+    # Respects CPU affinity and container cpusets, unlike os.cpu_count()
+    return max(len(os.sched_getaffinity(0)), 1)
+
+
+def prepare_metrics_dir(workers: int):
+    """Give workers a shared metrics directory unless one is configured."""
+    if workers < 2 or METRICS_DIR:
+        return
+    directory = os.path.join(tempfile.gettempdir(),
+                             f'organization-metrics-{os.getpid()}')
+    shutil.rmtree(directory, ignore_errors=True)
+    os.environ['METRICS_DIR'] = directory
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    if RUN_MIGRATIONS:
+        # env.py holds an advisory lock, so concurrently starting
+        # containers apply the migrations once
+        command.upgrade(Config(ALEMBIC_INI), 'head')
+    workers = worker_count()
+    prepare_metrics_dir(workers)
+    loop = 'uvloop' if importlib.util.find_spec('uvloop') else 'asyncio'
+    http = 'httptools' if importlib.util.find_spec('httptools') else 'h11'
+    logger.info("Starting %d workers (loop=%s, http=%s)", workers, loop,
+                http)
+    uvicorn.run('main:app', host=WEB_HOST, port=WEB_PORT, workers=workers,
+                loop=loop, http=http, proxy_headers=True,
+                timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,4 @@
 #!/bin/bash
 set -e
 cd app/
-poetry run alembic upgrade head
-exec poetry run uvicorn main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec poetry run python serve.py
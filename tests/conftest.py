@@ -0,0 +1,82 @@
+"""Fixtures for tests against a PostgreSQL database migrated to head.
+
+The database comes from the same DB_* settings as the app. Every test runs
+inside a transaction that is rolled back, so nothing is left behind.
+"""
+import contextlib
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from database.base import engine, get_async_session
+from main import app
+
+# Savepoint bookkeeping issued by the session fixture, not by the code
+# under test
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT',
+                        'ROLLBACK TO SAVEPOINT')
+
+
+@pytest.fixture
+async def connection() -> AsyncConnection:
+    try:
+        connection = await engine.connect()
+    except (OSError, OperationalError) as exc:
+        pytest.skip(f"PostgreSQL is not available: {exc}")
+    transaction = await connection.begin()
+    try:
+        yield connection
+    finally:
+        await transaction.rollback()
+        await connection.close()
+        # The pool is bound to this test's event loop
+        await engine.dispose()
+
+
+@pytest.fixture
+async def session(connection: AsyncConnection) -> AsyncSession:
+    # A commit in the code under test only releases a savepoint
+    async with AsyncSession(bind=connection, expire_on_commit=False,
+                            join_transaction_mode='create_savepoint') \
+            as session:
+        yield session
+
+
+@pytest.fixture
+async def client(session: AsyncSession) -> httpx.AsyncClient:
+    """API client whose writes go through the test session."""
+    app.dependency_overrides[get_async_session] = lambda: session
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url='http://test') as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_async_session)
+
+
+@pytest.fixture
+def statements():
+    """Context manager collecting `(statement, parameters)` pairs."""
+
+    @contextlib.contextmanager
+    def record():
+        log = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters,
+                                  context, executemany):
+            if not statement.lstrip().upper().startswith(
+                    SAVEPOINT_STATEMENTS):
+                log.append((statement, parameters))
+
+        event.listen(engine.sync_engine, 'before_cursor_execute',
+                     before_cursor_execute)
+        try:
+            yield log
+        finally:
+            event.remove(engine.sync_engine, 'before_cursor_execute',
+                         before_cursor_execute)
+
+    return record
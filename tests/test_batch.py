@@ -0,0 +1,71 @@
+"""Batches invalidate cached objects only once their transaction commits."""
+import pytest
+from sqlalchemy import insert
+
+from database import Department, Employee
+from database.batch import run_batch
+from database.cache import invalidation_listeners
+from schemas.batch import BatchInSchema
+
+
+@pytest.fixture
+async def org(session):
+    department = await session.scalar(insert(Department).values(
+        name='test-department').returning(Department.id))
+    employee = await session.scalar(insert(Employee).values(
+        name='test-employee', department_id=department).returning(
+        Employee.id))
+    return department, employee
+
+
+@pytest.fixture
+def invalidated(session):
+    """Invalidations as `(namespace, ids, committed)` triples."""
+    log = []
+    commits = []
+    commit = session.commit
+
+    async def record_commit():
+        await commit()
+        commits.append(True)
+
+    def listener(namespace, object_ids):
+        log.append((namespace, object_ids, bool(commits)))
+
+    session.commit = record_commit
+    invalidation_listeners.append(listener)
+    try:
+        yield log
+    finally:
+        invalidation_listeners.remove(listener)
+
+
+def _update(employee: int, department: int) -> dict:
+    return {'op': 'update', 'entity': 'employee', 'id': employee,
+            'data': {'name': 'renamed', 'department_id': department}}
+
+
+async def test_invalidates_after_commit(org, session, invalidated):
+    department, employee = org
+    result = await run_batch(BatchInSchema(operations=[
+        _update(employee, department),
+        {'op': 'delete', 'entity': 'department', 'id': department},
+    ]), session)
+
+    assert result.committed
+    assert ('employee', (employee,), True) in invalidated
+    # The department delete moved the employee out as well
+    assert ('department', (department,), True) in invalidated
+    assert all(committed for _, _, committed in invalidated)
+
+
+async def test_rolled_back_batch_invalidates_nothing(org, session,
+                                                     invalidated):
+    department, employee = org
+    result = await run_batch(BatchInSchema(operations=[
+        _update(employee, department),
+        {'op': 'delete', 'entity': 'employee', 'id': -1},
+    ]), session)
+
+    assert not result.committed
+    assert invalidated == []
@@ -0,0 +1,45 @@
+"""The per-process cache follows writes made through other workers."""
+import pytest
+
+from database import cache as cache_module
+from database.cache import MemoryCache
+
+
+@pytest.fixture
+def memory_cache(monkeypatch) -> MemoryCache:
+    memory_cache = MemoryCache(100, 60)
+    monkeypatch.setattr(cache_module, 'cache', memory_cache)
+    return memory_cache
+
+
+async def _cached(memory_cache: MemoryCache) -> set[str]:
+    return {key for key in ('employee:1', 'employee:2', 'position:3',
+                            'department:4')
+            if await memory_cache.get(key) is not None}
+
+
+async def test_change_evicts_its_keys(memory_cache):
+    for key in ('employee:1', 'employee:2', 'position:3', 'department:4'):
+        await memory_cache.set(key, {'version': 1})
+
+    cache_module._on_change({'entity': 'employee', 'op': 'update', 'id': 1,
+                             'data': {}})
+    assert await _cached(memory_cache) == {'employee:2', 'position:3',
+                                           'department:4'}
+
+    cache_module._on_change({'entity': 'department_position', 'op': 'link',
+                             'id': None, 'data': {'department_id': 4,
+                                                  'position_id': 3}})
+    assert await _cached(memory_cache) == {'employee:2'}
+
+
+async def test_import_and_gap_clear(memory_cache):
+    for key in ('employee:1', 'employee:2', 'position:3'):
+        await memory_cache.set(key, {'version': 1})
+
+    cache_module._on_change({'entity': 'employee', 'op': 'import',
+                             'id': None, 'data': None})
+    assert await _cached(memory_cache) == {'position:3'}
+
+    cache_module._on_change(None)
+    assert await _cached(memory_cache) == set()
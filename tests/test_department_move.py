@@ -0,0 +1,45 @@
+"""Department moves are guarded by the row version."""
+from sqlalchemy import insert, select, update
+
+from database import Department, crud
+
+
+async def _departments(session) -> tuple[int, int]:
+    parent = await session.scalar(insert(Department).values(
+        name='test-parent').returning(Department.id))
+    child = await session.scalar(insert(Department).values(
+        name='test-child').returning(Department.id))
+    for department_id in (parent, child):
+        await session.execute(crud._insert_closure_paths(department_id, None))
+    return parent, child
+
+
+async def test_move(session, client):
+    parent, child = await _departments(session)
+    response = await client.post(f'/api/departments/{child}/move',
+                                 json={'parent_id': parent})
+
+    assert response.status_code == 200
+    moved = (await session.execute(select(
+        Department.parent_id, Department.version).where(
+        Department.id == child))).one()
+    assert moved == (parent, 2)
+
+
+async def test_concurrent_write_conflicts(session, client, monkeypatch):
+    parent, child = await _departments(session)
+    is_descendant = crud.is_department_descendant
+
+    async def write_in_between(department_id, parent_id, session):
+        # Another transaction's write landing after the move read the row;
+        # the table-level UPDATE leaves the loaded object untouched
+        table = Department.__table__
+        await session.execute(update(table).where(
+            table.c.id == department_id).values(version=table.c.version + 1))
+        return await is_descendant(department_id, parent_id, session)
+
+    monkeypatch.setattr(crud, 'is_department_descendant', write_in_between)
+    response = await client.post(f'/api/departments/{child}/move',
+                                 json={'parent_id': parent})
+
+    assert response.status_code == 409
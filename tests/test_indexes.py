@@ -0,0 +1,79 @@
+"""The junction primary keys and foreign-key indexes serve the hot paths."""
+import pytest
+from sqlalchemy import insert, text
+
+from database import Department, Employee, Position, employee_position
+from database.crud import get_department_employee, delete_position_employee
+from schemas.pagination import PageSchema
+from schemas.position import PositionEmployeeSchema
+
+DEPARTMENTS = 50
+EMPLOYEES_PER_DEPARTMENT = 40
+POSITIONS = 20
+
+
+@pytest.fixture
+async def org(session):
+    department_ids = list(await session.scalars(
+        insert(Department).returning(Department.id),
+        [{'name': f'test-department-{i}'} for i in range(DEPARTMENTS)]))
+    position_ids = list(await session.scalars(
+        insert(Position).returning(Position.id),
+        [{'title': f'test-position-{i}'} for i in range(POSITIONS)]))
+    employee_ids = list(await session.scalars(
+        insert(Employee).returning(Employee.id),
+        [{'name': f'test-employee-{i}',
+          'department_id': department_ids[i % DEPARTMENTS]}
+         for i in range(DEPARTMENTS * EMPLOYEES_PER_DEPARTMENT)]))
+    await session.execute(insert(employee_position), [
+        {'employee_id': employee_id,
+         'position_id': position_ids[i % POSITIONS]}
+        for i, employee_id in enumerate(employee_ids)])
+    for table in ('departments', 'positions', 'employees',
+                  'employee_position'):
+        await session.execute(text(f'ANALYZE {table}'))
+    return department_ids, position_ids, employee_ids
+
+
+async def explain(connection, statement: str, parameters) -> str:
+    # The tables are small enough for a sequential scan to win on cost;
+    # with it priced out the planner still picks one when no index fits
+    await connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    await connection.exec_driver_sql('SET LOCAL enable_bitmapscan = off')
+    plan = await connection.exec_driver_sql(f'EXPLAIN {statement}',
+                                            parameters)
+    return '\n'.join(row[0] for row in plan)
+
+
+def assert_index_scan(plan: str, index: str):
+    assert f'Index Scan using {index}' in plan or \
+        f'Index Only Scan using {index}' in plan, plan
+
+
+async def test_department_employees_use_department_index(
+        org, session, connection, statements):
+    department_ids, _, _ = org
+    with statements() as log:
+        await get_department_employee(department_ids[0], PageSchema(),
+                                      session)
+    [(statement, parameters)] = log
+
+    plan = await explain(connection, statement, parameters)
+
+    assert_index_scan(plan, 'ix_employees_department_id')
+
+
+async def test_unlink_uses_junction_primary_key(org, session, connection,
+                                                statements):
+    _, position_ids, employee_ids = org
+    data = PositionEmployeeSchema(employee_id=employee_ids[0],
+                                  position_id=position_ids[0])
+    with statements() as log:
+        await delete_position_employee(data, session, commit=False)
+    statement, parameters = next(
+        (statement, parameters) for statement, parameters in log
+        if statement.startswith('DELETE FROM employee_position'))
+
+    plan = await explain(connection, statement, parameters)
+
+    assert_index_scan(plan, 'pk_employee_position')
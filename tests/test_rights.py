@@ -0,0 +1,29 @@
+"""Rights loads racing an eviction are not cached."""
+from sqlalchemy import insert
+
+from database import Department, Employee
+from database.rights import get_rights_masks, rights_cache
+
+
+async def test_eviction_during_load_is_not_cached(session, monkeypatch):
+    department = await session.scalar(insert(Department).values(
+        name='test-department').returning(Department.id))
+    employee = await session.scalar(insert(Employee).values(
+        name='test-employee', department_id=department).returning(
+        Employee.id))
+    execute = session.execute
+
+    async def revoke_while_reading(*args, **kwargs):
+        result = await execute(*args, **kwargs)
+        # A revoke committed after the rows were read
+        rights_cache.evict_employee(employee)
+        return result
+
+    monkeypatch.setattr(session, 'execute', revoke_while_reading)
+    assert employee in await get_rights_masks((employee,), False, session)
+    assert rights_cache.get((employee, False)) is None
+
+    monkeypatch.setattr(session, 'execute', execute)
+    await get_rights_masks((employee,), False, session)
+    assert rights_cache.get((employee, False)) is not None
+    rights_cache.evict_employee(employee)
@@ -0,0 +1,148 @@
+"""Mutation endpoints write with a fixed number of statements."""
+import pytest
+from sqlalchemy import insert
+
+from database import Department, Employee, Position, employee_position
+from database.crud import delete_position_employee, \
+    delete_department_position
+from schemas.department import DepartmentPositionSchema
+from schemas.position import PositionEmployeeSchema
+
+
+def mutations(log: list) -> list[str]:
+    # Every mutation also appends to the change log with one statement of
+    # its own; that write is not part of what is counted here
+    return [statement for statement, _ in log
+            if 'change_log' not in statement]
+
+
+@pytest.fixture
+async def org(session):
+    department = await session.scalar(insert(Department).values(
+        name='test-department').returning(Department.id))
+    position = await session.scalar(insert(Position).values(
+        title='test-position', rights='').returning(Position.id))
+    employee = await session.scalar(insert(Employee).values(
+        name='test-employee', department_id=department).returning(
+        Employee.id))
+    return department, position, employee
+
+
+async def test_create_employee(org, client, statements):
+    department, _, _ = org
+    with statements() as log:
+        response = await client.post('/api/employee', json={
+            'name': 'new-employee', 'department_id': department})
+
+    assert response.status_code == 201
+    assert len(mutations(log)) == 1
+
+
+async def test_update_employee(org, client, statements):
+    department, _, employee = org
+    with statements() as log:
+        response = await client.put(f'/api/employee/{employee}', json={
+            'name': 'renamed-employee', 'department_id': department})
+
+    assert response.status_code == 202
+    assert len(mutations(log)) == 1
+
+
+async def test_delete_employee(org, client, statements):
+    _, _, employee = org
+    with statements() as log:
+        response = await client.delete(f'/api/employee/{employee}')
+
+    assert response.status_code == 204
+    # Junction rows first, then the employee
+    assert len(mutations(log)) == 2
+
+
+async def test_create_position(client, statements):
+    with statements() as log:
+        response = await client.post('/api/positions',
+                                     json={'title': 'new-position', 'rights': ''})
+
+    assert response.status_code == 201
+    assert len(mutations(log)) == 1
+
+
+async def test_update_position(org, client, statements):
+    _, position, _ = org
+    with statements() as log:
+        response = await client.put(f'/api/positions/{position}',
+                                    json={'title': 'renamed-position',
+                                          'rights': ''})
+
+    assert response.status_code == 202
+    assert len(mutations(log)) == 1
+
+
+async def test_delete_position(org, client, statements):
+    _, position, _ = org
+    with statements() as log:
+        response = await client.delete(f'/api/positions/{position}')
+
+    assert response.status_code == 204
+    # Both junction tables, then the position
+    assert len(mutations(log)) == 3
+
+
+# The unlink routes are shadowed by DELETE /<entity>/{id}, which is
+# declared first, so they are exercised through the crud functions.
+
+async def test_link_and_unlink_employee(org, session, client, statements):
+    _, position, employee = org
+    data = {'employee_id': employee, 'position_id': position}
+    with statements() as log:
+        response = await client.post('/api/positions/add_employee',
+                                     json=data)
+
+    assert response.status_code == 201
+    assert len(mutations(log)) == 1
+
+    with statements() as log:
+        await delete_position_employee(PositionEmployeeSchema(**data),
+                                       session)
+
+    assert len(mutations(log)) == 1
+
+
+async def test_link_and_unlink_department_position(org, session, client,
+                                                    statements):
+    department, position, _ = org
+    data = {'department_id': department, 'position_id': position}
+    with statements() as log:
+        response = await client.post('/api/departments/add_position',
+                                     json=data)
+
+    assert response.status_code == 201
+    assert len(mutations(log)) == 1
+
+    with statements() as log:
+        await delete_department_position(DepartmentPositionSchema(**data),
+                                         session)
+
+    assert len(mutations(log)) == 1
+
+
+async def test_existing_link_is_rejected_in_one_statement(
+        org, session, client, statements):
+    _, position, employee = org
+    await session.execute(insert(employee_position).values(
+        employee_id=employee, position_id=position))
+    with statements() as log:
+        response = await client.post('/api/positions/add_employee', json={
+            'employee_id': employee, 'position_id': position})
+
+    assert response.status_code == 400
+    assert len(mutations(log)) == 1
+
+
+async def test_missing_row_is_404_in_one_statement(client, statements):
+    with statements() as log:
+        response = await client.put('/api/employee/0', json={
+            'name': 'nobody', 'department_id': None})
+
+    assert response.status_code == 404
+    assert len(mutations(log)) == 1
@@ -0,0 +1,50 @@
+"""Department stats stay current without the view refresh."""
+from sqlalchemy import insert, select, text
+
+from database import Department, Employee, Position, employee_position, \
+    departament_position, crud
+from database import stats
+from schemas.pagination import PageSchema
+
+
+async def _org(session) -> list[int]:
+    parent = await session.scalar(insert(Department).values(
+        name='test-parent').returning(Department.id))
+    child = await session.scalar(insert(Department).values(
+        name='test-child', parent_id=parent).returning(Department.id))
+    await session.execute(crud._insert_closure_paths(parent, None))
+    await session.execute(crud._insert_closure_paths(child, parent))
+    position = await session.scalar(insert(Position).values(
+        title='test-position', rights='').returning(Position.id))
+    employees = list(await session.scalars(insert(Employee).returning(
+        Employee.id), [{'name': f'test-employee-{index}',
+                        'department_id': department}
+                       for index, department in enumerate(
+                           (parent, child, child))]))
+    await session.execute(insert(employee_position).values(
+        employee_id=employees[1], position_id=position))
+    await session.execute(insert(departament_position).values(
+        [{'departament_id': child, 'position_id': position},
+         {'departament_id': parent, 'position_id': position}]))
+    return [parent, child]
+
+
+async def test_live_stats_match_the_view(session):
+    departments = await _org(session)
+    live, _ = await stats.list_department_stats(PageSchema(), session,
+                                                departments)
+
+    await session.execute(text('REFRESH MATERIALIZED VIEW department_stats'))
+    view = (await session.execute(select(stats.department_stats).where(
+        stats.department_stats.c.department_id.in_(departments)).order_by(
+        stats.department_stats.c.department_id))).all()
+    assert [tuple(row) for row in live] == [tuple(row) for row in view]
+    assert tuple(live[0]) == (departments[0], 1, 3, 1, 0)
+
+
+async def test_department_missing_from_view(session, monkeypatch):
+    monkeypatch.setattr(stats, 'STATS_REFRESH_ENABLED', True)
+    parent, child = await _org(session)
+
+    result = await stats.get_department_stats(child, session)
+    assert tuple(result) == (child, 2, 2, 1, 1)